@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+
+from roteiro import plano_usa_roteiro, capacidades_dos_centros, simular, dias_do_intervalo
+
+# Agendamento da fila de pedidos, sem dependência do Streamlit, para ser usado
+# tanto pela interface quanto pelo serviço de reagendamento das plantas.
+# `config` é o dicionário salvo em historico_pedidos.json:
+#   {'workers': ..., 'minutes_per_day': ..., 'efficiency': ..., 'work_centers': {...}}
+
+def minutos_efetivos(config):
+    return config['minutes_per_day'] * (config['efficiency'] / 100)
+
+def calcular_data_fim(calendario, start_date, total_minutes, workers, effective_minutes):
+    daily_capacity = workers * effective_minutes
+    days_needed = int((total_minutes + daily_capacity - 1) // daily_capacity)
+
+    return calendario.avancar_dias_uteis(start_date, days_needed), days_needed
+
+def reagendar(orders, config, calendario, index=0, start_date=None):
+    # Recalcula apenas os pedidos a partir de `index`; os anteriores mantêm as
+    # datas. Retorna a primeira posição recalculada.
+    if not orders:
+        return 0
+
+    effective_minutes = minutos_efetivos(config)
+
+    # Com roteiros os pedidos se sobrepõem nos centros de trabalho, então o plano
+    # inteiro é simulado de novo a partir do primeiro pedido
+    if plano_usa_roteiro(orders):
+        if index > 0 or start_date is None:
+            start_date = orders[0]['start_date'] if index > 0 else datetime.now()
+        reagendar_com_roteiro(orders, config, calendario, start_date)
+        return 0
+
+    if index > 0:
+        current_date = orders[index-1]['end_date'] + timedelta(days=1)
+    elif start_date is None:
+        current_date = datetime.now()
+    else:
+        current_date = start_date
+
+    current_date = calendario.proximo_dia_util(current_date)
+
+    for order in orders[index:]:
+        order['start_date'] = current_date
+
+        end_date, days_needed = calcular_data_fim(
+            calendario,
+            current_date,
+            order['total_minutes'],
+            config['workers'],
+            effective_minutes
+        )
+
+        order['end_date'] = end_date
+        order['days_needed'] = days_needed
+
+        current_date = calendario.proximo_dia_util(end_date + timedelta(days=1))
+
+    return index
+
+def reagendar_com_roteiro(orders, config, calendario, start_date):
+    capacities = capacidades_dos_centros(
+        orders, config['workers'], config.get('work_centers', {}), minutos_efetivos(config)
+    )
+    intervals = simular(orders, capacities)
+
+    # Dia útil de índice i do plano (0 = primeiro dia útil a partir do início)
+    working_days = [calendario.proximo_dia_util(start_date)]
+
+    def working_day(i):
+        while len(working_days) <= i:
+            working_days.append(calendario.avancar_dias_uteis(working_days[-1], 1))
+        return working_days[i]
+
+    for order, (start, end) in zip(orders, intervals):
+        first, days_needed = dias_do_intervalo(start, end)
+        order['start_date'] = working_day(first)
+        order['end_date'] = working_day(first + days_needed)
+        order['days_needed'] = days_needed
@@ -0,0 +1,266 @@
+from datetime import date, datetime, timedelta
+
+# Motor de regras de calendário. As regras (feriados, férias coletivas,
+# paradas recorrentes, datas avulsas) são compiladas em um bitset por ano,
+# onde o bit i indica se o dia i+1 do ano é útil. A consulta de um dia é O(1)
+# e o bitset de cada ano só é recompilado quando as regras mudam.
+#
+# Formato das regras (dicts, serializáveis em JSON):
+#   {'tipo': 'feriado', 'nome': ..., 'mes': 12, 'dia': 25}
+#   {'tipo': 'movel', 'nome': ..., 'dias_pascoa': -2}
+#   {'tipo': 'periodo', 'nome': ..., 'inicio': 'AAAA-MM-DD', 'fim': 'AAAA-MM-DD'}
+#   {'tipo': 'semanal', 'nome': ..., 'dia_semana': 0}            (0 = segunda)
+#   {'tipo': 'mensal', 'nome': ..., 'dia_semana': 4, 'ordem': -1} (última sexta)
+#   {'tipo': 'data', 'nome': ..., 'data': 'AAAA-MM-DD'}
+# Campos opcionais em qualquer regra:
+#   'anos': [2026, 2027]  -> vale apenas nesses anos
+#   'regiao': 'SP'        -> vale apenas para calendários dessa região
+
+HORIZONTE_ANOS = 10
+
+TIPOS_REGRA = {
+    'feriado': 'Feriado anual',
+    'movel': 'Feriado móvel (Páscoa)',
+    'periodo': 'Período (férias coletivas)',
+    'semanal': 'Parada semanal',
+    'mensal': 'Parada mensal',
+    'data': 'Data avulsa',
+}
+
+FERIADOS_NACIONAIS = [
+    {'tipo': 'feriado', 'nome': 'Confraternização Universal', 'mes': 1, 'dia': 1},
+    {'tipo': 'movel', 'nome': 'Carnaval', 'dias_pascoa': -48},
+    {'tipo': 'movel', 'nome': 'Carnaval', 'dias_pascoa': -47},
+    {'tipo': 'movel', 'nome': 'Sexta-feira Santa', 'dias_pascoa': -2},
+    {'tipo': 'feriado', 'nome': 'Tiradentes', 'mes': 4, 'dia': 21},
+    {'tipo': 'feriado', 'nome': 'Dia do Trabalho', 'mes': 5, 'dia': 1},
+    {'tipo': 'movel', 'nome': 'Corpus Christi', 'dias_pascoa': 60},
+    {'tipo': 'feriado', 'nome': 'Independência', 'mes': 9, 'dia': 7},
+    {'tipo': 'feriado', 'nome': 'Nossa Senhora Aparecida', 'mes': 10, 'dia': 12},
+    {'tipo': 'feriado', 'nome': 'Finados', 'mes': 11, 'dia': 2},
+    {'tipo': 'feriado', 'nome': 'Proclamação da República', 'mes': 11, 'dia': 15},
+    {'tipo': 'feriado', 'nome': 'Consciência Negra', 'mes': 11, 'dia': 20},
+    {'tipo': 'feriado', 'nome': 'Natal', 'mes': 12, 'dia': 25},
+]
+
+def pascoa(ano):
+    # Algoritmo de Meeus/Jones/Butcher (calendário gregoriano)
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+def _data(valor):
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(valor, '%Y-%m-%d').date()
+
+def _dias_no_ano(ano):
+    return (date(ano + 1, 1, 1) - date(ano, 1, 1)).days
+
+def _indice(dia):
+    return dia.timetuple().tm_yday - 1
+
+def _bits_intervalo(inicio, fim):
+    # Máscara com os bits [inicio, fim] ligados
+    return ((1 << (fim - inicio + 1)) - 1) << inicio
+
+def _mascara_fim_de_semana(ano):
+    mascara = 0
+    primeiro = date(ano, 1, 1).weekday()
+    for idx in range(_dias_no_ano(ano)):
+        if (primeiro + idx) % 7 >= 5:
+            mascara |= 1 << idx
+    return mascara
+
+def _mascara_dia_semana(ano, dia_semana):
+    primeiro = date(ano, 1, 1).weekday()
+    mascara = 0
+    for idx in range((dia_semana - primeiro) % 7, _dias_no_ano(ano), 7):
+        mascara |= 1 << idx
+    return mascara
+
+def _dias_mensais(ano, dia_semana, ordem):
+    for mes in range(1, 13):
+        if ordem > 0:
+            dia = date(ano, mes, 1)
+            dia += timedelta(days=(dia_semana - dia.weekday()) % 7 + 7 * (ordem - 1))
+        else:
+            proximo = date(ano + (mes == 12), mes % 12 + 1, 1)
+            dia = proximo - timedelta(days=1)
+            dia -= timedelta(days=(dia.weekday() - dia_semana) % 7 + 7 * (-ordem - 1))
+        if dia.year == ano and dia.month == mes:
+            yield dia
+
+def mascara_regra(regra, ano):
+    # Bits dos dias do ano bloqueados pela regra
+    anos = regra.get('anos')
+    if anos and ano not in anos:
+        return 0
+
+    tipo = regra['tipo']
+    if tipo == 'feriado':
+        try:
+            return 1 << _indice(date(ano, regra['mes'], regra['dia']))
+        except ValueError:
+            return 0  # 29/02 em ano não bissexto
+    if tipo == 'movel':
+        dia = pascoa(ano) + timedelta(days=regra['dias_pascoa'])
+        return 1 << _indice(dia) if dia.year == ano else 0
+    if tipo == 'data':
+        dia = _data(regra['data'])
+        return 1 << _indice(dia) if dia.year == ano else 0
+    if tipo == 'periodo':
+        inicio = max(_data(regra['inicio']), date(ano, 1, 1))
+        fim = min(_data(regra['fim']), date(ano, 12, 31))
+        if inicio > fim:
+            return 0
+        return _bits_intervalo(_indice(inicio), _indice(fim))
+    if tipo == 'semanal':
+        return _mascara_dia_semana(ano, regra['dia_semana'])
+    if tipo == 'mensal':
+        mascara = 0
+        for dia in _dias_mensais(ano, regra['dia_semana'], regra['ordem']):
+            mascara |= 1 << _indice(dia)
+        return mascara
+    raise ValueError(f"Tipo de regra desconhecido: {tipo}")
+
+def descrever_regra(regra):
+    tipo = regra['tipo']
+    if tipo == 'feriado':
+        texto = f"{regra['dia']:02d}/{regra['mes']:02d} (todo ano)"
+    elif tipo == 'movel':
+        texto = f"Páscoa {regra['dias_pascoa']:+d} dias"
+    elif tipo == 'data':
+        texto = _data(regra['data']).strftime('%d/%m/%Y')
+    elif tipo == 'periodo':
+        texto = f"{_data(regra['inicio']).strftime('%d/%m/%Y')} a {_data(regra['fim']).strftime('%d/%m/%Y')}"
+    elif tipo == 'semanal':
+        texto = f"Toda {['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom'][regra['dia_semana']]}"
+    else:
+        ordem = 'Última' if regra['ordem'] < 0 else f"{regra['ordem']}ª"
+        texto = f"{ordem} {['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom'][regra['dia_semana']]} do mês"
+    if regra.get('anos'):
+        texto += f" [{', '.join(str(a) for a in regra['anos'])}]"
+    return texto
+
+
+class CalendarioProducao:
+    def __init__(self, regras=(), datas_bloqueadas=(), regiao=None):
+        self.regiao = regiao
+        self._regras = list(regras)
+        self._datas = {_data(d) for d in datas_bloqueadas}
+        self._cache = {}
+
+    @property
+    def regras(self):
+        return list(self._regras)
+
+    def _regra_ativa(self, regra):
+        return not regra.get('regiao') or regra['regiao'] == self.regiao
+
+    def _compilar(self, ano):
+        bloqueados = _mascara_fim_de_semana(ano)
+        for regra in self._regras:
+            if self._regra_ativa(regra):
+                bloqueados |= mascara_regra(regra, ano)
+        for dia in self._datas:
+            if dia.year == ano:
+                bloqueados |= 1 << _indice(dia)
+        return ((1 << _dias_no_ano(ano)) - 1) & ~bloqueados
+
+    def dias_uteis_do_ano(self, ano):
+        bits = self._cache.get(ano)
+        if bits is None:
+            bits = self._cache[ano] = self._compilar(ano)
+        return bits
+
+    def compilar_horizonte(self, ano_inicial=None, anos=HORIZONTE_ANOS):
+        ano_inicial = ano_inicial or date.today().year
+        for ano in range(ano_inicial, ano_inicial + anos):
+            self.dias_uteis_do_ano(ano)
+
+    def dia_util(self, dia):
+        dia = _data(dia)
+        return bool(self.dias_uteis_do_ano(dia.year) >> _indice(dia) & 1)
+
+    def avancar_dias_uteis(self, dia, quantidade):
+        # Retorna o `quantidade`-ésimo dia útil depois de `dia`. Aceita date ou
+        # datetime e devolve o mesmo tipo (um datetime mantém o horário).
+        destino = self._avancar(_data(dia), quantidade)
+        if isinstance(dia, datetime):
+            return dia + timedelta(days=(destino - dia.date()).days)
+        return destino
+
+    def _avancar(self, dia, quantidade):
+        # Pula anos inteiros pela contagem de bits em vez de testar dia a dia
+        if quantidade <= 0:
+            return dia
+        atual = dia + timedelta(days=1)
+        limite = atual.year + HORIZONTE_ANOS + quantidade // 100
+        while atual.year <= limite:
+            restantes = self.dias_uteis_do_ano(atual.year) >> _indice(atual)
+            disponiveis = bin(restantes).count('1')
+            if disponiveis < quantidade:
+                quantidade -= disponiveis
+                atual = date(atual.year + 1, 1, 1)
+                continue
+            while True:
+                if restantes & 1:
+                    quantidade -= 1
+                    if quantidade == 0:
+                        return atual
+                restantes >>= 1
+                atual += timedelta(days=1)
+        raise ValueError("Não há dias úteis suficientes no horizonte do calendário")
+
+    def proximo_dia_util(self, dia):
+        # O próprio dia, se for útil, ou o próximo dia útil (mesmo tipo de `dia`)
+        return self.avancar_dias_uteis(dia - timedelta(days=1), 1)
+
+    # Alterações: regras invalidam todo o cache, datas avulsas só o próprio ano
+    def adicionar_regra(self, regra):
+        mascara_regra(regra, date.today().year)  # valida a regra
+        if regra['tipo'] == 'periodo' and _data(regra['inicio']) > _data(regra['fim']):
+            raise ValueError("Período com início depois do fim")
+        self._regras.append(regra)
+        self._cache.clear()
+
+    def remover_regra(self, idx):
+        regra = self._regras.pop(idx)
+        self._cache.clear()
+        return regra
+
+    def bloquear_data(self, dia):
+        dia = _data(dia)
+        if dia not in self._datas:
+            self._datas.add(dia)
+            self._cache.pop(dia.year, None)
+
+    def definir_datas_bloqueadas(self, datas):
+        novas = {_data(d) for d in datas}
+        for dia in novas ^ self._datas:
+            self._cache.pop(dia.year, None)
+        self._datas = novas
+
+    def definir_regiao(self, regiao):
+        regiao = regiao or None
+        if regiao != self.regiao:
+            self.regiao = regiao
+            self._cache.clear()
+
+    def data_bloqueada(self, dia):
+        return _data(dia) in self._datas
+
+
+def regras_de_datas(datas, nome='Dia bloqueado'):
+    return [{'tipo': 'data', 'nome': nome, 'data': _data(d).strftime('%Y-%m-%d')} for d in datas]
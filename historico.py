@@ -0,0 +1,309 @@
+from collections import deque, namedtuple
+
+# Estruturas persistentes (imutáveis) com compartilhamento estrutural.
+# Cada alteração copia apenas o caminho da raiz até o nó alterado, então
+# uma versão nova custa O(log n) de memória e as versões antigas continuam
+# válidas para desfazer/refazer.
+
+# Nó de árvore AVL: (valor, esquerda, direita, altura, tamanho)
+def _altura(no):
+    return no[3] if no else 0
+
+def _tamanho(no):
+    return no[4] if no else 0
+
+def _no(valor, esq, dir):
+    return (valor, esq, dir, max(_altura(esq), _altura(dir)) + 1, _tamanho(esq) + _tamanho(dir) + 1)
+
+def _rot_direita(no):
+    valor, esq, dir = no[0], no[1], no[2]
+    return _no(esq[0], esq[1], _no(valor, esq[2], dir))
+
+def _rot_esquerda(no):
+    valor, esq, dir = no[0], no[1], no[2]
+    return _no(dir[0], _no(valor, esq, dir[1]), dir[2])
+
+def _balancear(valor, esq, dir):
+    fator = _altura(esq) - _altura(dir)
+    if fator > 1:
+        if _altura(esq[1]) < _altura(esq[2]):
+            esq = _rot_esquerda(esq)
+        return _rot_direita(_no(valor, esq, dir))
+    if fator < -1:
+        if _altura(dir[2]) < _altura(dir[1]):
+            dir = _rot_direita(dir)
+        return _rot_esquerda(_no(valor, esq, dir))
+    return _no(valor, esq, dir)
+
+def _construir(valores, inicio, fim):
+    if inicio >= fim:
+        return None
+    meio = (inicio + fim) // 2
+    return _no(valores[meio], _construir(valores, inicio, meio), _construir(valores, meio + 1, fim))
+
+def _iterar(no):
+    pilha = []
+    while pilha or no:
+        while no:
+            pilha.append(no)
+            no = no[1]
+        no = pilha.pop()
+        yield no[0]
+        no = no[2]
+
+def _remover_minimo(no):
+    # Retorna (menor valor, árvore sem ele)
+    if no[1] is None:
+        return no[0], no[2]
+    minimo, esq = _remover_minimo(no[1])
+    return minimo, _balancear(no[0], esq, no[2])
+
+def _juntar(esq, dir):
+    if esq is None:
+        return dir
+    if dir is None:
+        return esq
+    minimo, dir = _remover_minimo(dir)
+    return _balancear(minimo, esq, dir)
+
+# Operações por posição (vetor)
+def _obter(no, idx):
+    while no:
+        tam_esq = _tamanho(no[1])
+        if idx < tam_esq:
+            no = no[1]
+        elif idx == tam_esq:
+            return no[0]
+        else:
+            idx -= tam_esq + 1
+            no = no[2]
+    raise IndexError(idx)
+
+def _substituir(no, idx, valor):
+    tam_esq = _tamanho(no[1])
+    if idx < tam_esq:
+        return _no(no[0], _substituir(no[1], idx, valor), no[2])
+    if idx == tam_esq:
+        return _no(valor, no[1], no[2])
+    return _no(no[0], no[1], _substituir(no[2], idx - tam_esq - 1, valor))
+
+def _inserir_em(no, idx, valor):
+    if no is None:
+        return _no(valor, None, None)
+    tam_esq = _tamanho(no[1])
+    if idx <= tam_esq:
+        return _balancear(no[0], _inserir_em(no[1], idx, valor), no[2])
+    return _balancear(no[0], no[1], _inserir_em(no[2], idx - tam_esq - 1, valor))
+
+def _remover_em(no, idx):
+    tam_esq = _tamanho(no[1])
+    if idx < tam_esq:
+        return _balancear(no[0], _remover_em(no[1], idx), no[2])
+    if idx == tam_esq:
+        return _juntar(no[1], no[2])
+    return _balancear(no[0], no[1], _remover_em(no[2], idx - tam_esq - 1))
+
+# Operações por valor (conjunto ordenado)
+def _contem(no, valor):
+    while no:
+        if valor < no[0]:
+            no = no[1]
+        elif no[0] < valor:
+            no = no[2]
+        else:
+            return True
+    return False
+
+def _inserir_valor(no, valor):
+    if no is None:
+        return _no(valor, None, None)
+    if valor < no[0]:
+        return _balancear(no[0], _inserir_valor(no[1], valor), no[2])
+    if no[0] < valor:
+        return _balancear(no[0], no[1], _inserir_valor(no[2], valor))
+    return no
+
+def _remover_valor(no, valor):
+    if no is None:
+        return None
+    if valor < no[0]:
+        return _balancear(no[0], _remover_valor(no[1], valor), no[2])
+    if no[0] < valor:
+        return _balancear(no[0], no[1], _remover_valor(no[2], valor))
+    return _juntar(no[1], no[2])
+
+
+class VetorPersistente:
+    __slots__ = ('_raiz',)
+
+    def __init__(self, valores=(), _raiz=None):
+        if _raiz is None:
+            valores = list(valores)
+            _raiz = _construir(valores, 0, len(valores))
+        self._raiz = _raiz
+
+    def __len__(self):
+        return _tamanho(self._raiz)
+
+    def __iter__(self):
+        return _iterar(self._raiz)
+
+    def __getitem__(self, idx):
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return _obter(self._raiz, idx)
+
+    def _novo(self, raiz):
+        return VetorPersistente(_raiz=raiz) if raiz is not None else VetorPersistente()
+
+    def anexar(self, valor):
+        return self.inserir(len(self), valor)
+
+    def inserir(self, idx, valor):
+        return self._novo(_inserir_em(self._raiz, idx, valor))
+
+    def remover(self, idx):
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return self._novo(_remover_em(self._raiz, idx))
+
+    def substituir(self, idx, valor):
+        if not 0 <= idx < len(self):
+            raise IndexError(idx)
+        return self._novo(_substituir(self._raiz, idx, valor))
+
+    def trocar(self, i, j):
+        a, b = self[i], self[j]
+        return self.substituir(i, b).substituir(j, a)
+
+
+class ConjuntoPersistente:
+    __slots__ = ('_raiz',)
+
+    def __init__(self, valores=(), _raiz=None):
+        if _raiz is None:
+            valores = sorted(set(valores))
+            _raiz = _construir(valores, 0, len(valores))
+        self._raiz = _raiz
+
+    def __len__(self):
+        return _tamanho(self._raiz)
+
+    def __iter__(self):
+        return _iterar(self._raiz)
+
+    def __contains__(self, valor):
+        return _contem(self._raiz, valor)
+
+    def _novo(self, raiz):
+        return ConjuntoPersistente(_raiz=raiz) if raiz is not None else ConjuntoPersistente()
+
+    def adicionar(self, valor):
+        return self._novo(_inserir_valor(self._raiz, valor))
+
+    def descartar(self, valor):
+        return self._novo(_remover_valor(self._raiz, valor))
+
+
+# Um estado do plano: fila de pedidos e dias bloqueados
+EstadoPlano = namedtuple('EstadoPlano', ['pedidos', 'bloqueados'])
+
+def pedido_base(order):
+    # Registro imutável do pedido guardado no histórico. As datas guardadas são
+    # as do momento do cadastro; ao desfazer/refazer o agendador recalcula as
+    # datas a partir da primeira posição alterada.
+    base = dict(order)
+    base['items'] = tuple(dict(item) for item in order.get('items', []))
+    return base
+
+def pedido_de_base(base):
+    order = dict(base)
+    order['items'] = [dict(item) for item in base['items']]
+    return order
+
+
+class HistoricoEdicoes:
+    def __init__(self, orders=(), blocked_days=(), limite=100):
+        self.atual = EstadoPlano(
+            VetorPersistente(pedido_base(o) for o in orders),
+            ConjuntoPersistente(blocked_days)
+        )
+        # deque com maxlen descarta automaticamente os estados mais antigos
+        self._desfazer = deque(maxlen=limite)
+        self._refazer = []
+
+    @property
+    def pode_desfazer(self):
+        return bool(self._desfazer)
+
+    @property
+    def pode_refazer(self):
+        return bool(self._refazer)
+
+    def registrar(self, pedidos=None, bloqueados=None):
+        novo = EstadoPlano(
+            self.atual.pedidos if pedidos is None else pedidos,
+            self.atual.bloqueados if bloqueados is None else bloqueados
+        )
+        self._desfazer.append(self.atual)
+        self._refazer.clear()
+        self.atual = novo
+        return novo
+
+    def adicionar_pedido(self, order):
+        return self.registrar(pedidos=self.atual.pedidos.anexar(pedido_base(order)))
+
+    def remover_pedido(self, idx):
+        return self.registrar(pedidos=self.atual.pedidos.remover(idx))
+
+    def trocar_pedidos(self, i, j):
+        return self.registrar(pedidos=self.atual.pedidos.trocar(i, j))
+
+    def bloquear_dia(self, dia):
+        return self.registrar(bloqueados=self.atual.bloqueados.adicionar(dia))
+
+    def desfazer(self):
+        if not self._desfazer:
+            return None
+        self._refazer.append(self.atual)
+        self.atual = self._desfazer.pop()
+        return self.atual
+
+    def refazer(self):
+        if not self._refazer:
+            return None
+        self._desfazer.append(self.atual)
+        self.atual = self._refazer.pop()
+        return self.atual
+
+
+def primeira_diferenca(anterior, novo):
+    # Primeira posição da fila em que os estados divergem. Como os registros
+    # base são compartilhados entre versões, a comparação é por identidade.
+    if anterior.pedidos._raiz is novo.pedidos._raiz:
+        return min(len(anterior.pedidos), len(novo.pedidos))
+    for idx, (a, b) in enumerate(zip(anterior.pedidos, novo.pedidos)):
+        if a is not b:
+            return idx
+    return min(len(anterior.pedidos), len(novo.pedidos))
+
+def dias_alterados(anterior, novo):
+    # Dias bloqueados que entraram ou saíram entre os dois estados
+    if anterior.bloqueados._raiz is novo.bloqueados._raiz:
+        return set()
+    return set(anterior.bloqueados) ^ set(novo.bloqueados)
+
+def posicao_a_recalcular(anterior, novo, orders):
+    # Primeira posição a reagendar ao passar de `anterior` para `novo`, onde
+    # `orders` é a fila atual (de `anterior`, com as datas calculadas). Um dia
+    # bloqueado alterado afeta o primeiro pedido que termina nele ou depois.
+    primeira = primeira_diferenca(anterior, novo)
+    alterados = dias_alterados(anterior, novo)
+    if alterados:
+        mais_cedo = min(alterados)
+        for idx in range(min(primeira, len(orders))):
+            if orders[idx]['end_date'].date() >= mais_cedo:
+                return idx
+    return primeira
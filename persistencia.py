@@ -0,0 +1,239 @@
+import atexit
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+# Gravação em segundo plano. Cada arquivo marcado como "sujo" guarda apenas os
+# últimos dados marcados; uma thread grava os arquivos depois de uma janela
+# de espera (debounce) sem novas marcações, ou imediatamente em descarregar().
+#
+# Ordem de gravação: cada marcação recebe uma geração crescente e os arquivos
+# são gravados na ordem em que ficaram sujos. gravado(g) só é verdadeiro quando
+# todas as marcações até g estão em disco (ou foram substituídas por uma
+# marcação mais nova do mesmo arquivo, já gravada). Uma gravação que falha
+# continua pendente e é tentada de novo; descarregar() retorna False.
+#
+# Com `serializar`, quem marca passa um valor imutável (por exemplo, o estado
+# persistente do histórico) e a conversão para JSON, O(n), é feita na thread
+# de gravação; a marcação em si é O(1).
+
+ATRASO_PADRAO = 0.5
+
+def gravar_json(caminho, dados):
+    # Grava em arquivo temporário e troca atomicamente, para nunca deixar
+    # um JSON pela metade no disco
+    pasta = os.path.dirname(os.path.abspath(caminho))
+    fd, temporario = tempfile.mkstemp(dir=pasta, prefix='.tmp_', suffix='.json')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(dados, f, indent=4, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporario, caminho)
+    except:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def carregar_json(caminho, padrao=None):
+    if os.path.exists(caminho):
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except:
+            return padrao
+    return padrao
+
+def plano_para_json(config, orders):
+    data = {
+        'config': config,
+        'orders': []
+    }
+
+    for order in orders:
+        order_copy = order.copy()
+        order_copy['items'] = [dict(item) for item in order.get('items', [])]
+        order_copy['start_date'] = order['start_date'].strftime('%Y-%m-%d')
+        order_copy['end_date'] = order['end_date'].strftime('%Y-%m-%d')
+        data['orders'].append(order_copy)
+
+    return data
+
+def instantaneo_para_json(instantaneo):
+    # (config, registros base da fila, datas (início, fim, dias) por posição)
+    config, pedidos, datas = instantaneo
+    orders = [
+        dict(base, start_date=inicio, end_date=fim, days_needed=dias)
+        for base, (inicio, fim, dias) in zip(pedidos, datas)
+    ]
+    return plano_para_json(config, orders)
+
+def datas_para_json(datas):
+    return [d.strftime('%Y-%m-%d') for d in datas]
+
+def pedidos_de_json(saved_orders):
+    orders = []
+    for order in saved_orders:
+        order_copy = order.copy()
+        order_copy['start_date'] = datetime.strptime(order['start_date'], '%Y-%m-%d')
+        order_copy['end_date'] = datetime.strptime(order['end_date'], '%Y-%m-%d')
+        if 'items' not in order_copy:
+            order_copy['items'] = [{
+                'part_name': 'Item Genérico',
+                'part_ref': 'N/A',
+                'quantity': 1,
+                'time_per_unit': order_copy.get('total_minutes', 0),
+                'total_time': order_copy.get('total_minutes', 0),
+                'production_order': 'N/A'
+            }]
+        orders.append(order_copy)
+    return orders
+
+def datas_de_json(saved_dates):
+    return [datetime.strptime(d, '%Y-%m-%d').date() for d in saved_dates]
+
+
+class GravadorAssincrono:
+    def __init__(self, atraso=ATRASO_PADRAO):
+        self.atraso = atraso
+        self._cond = threading.Condition()
+        self._pendentes = {}  # caminho -> (geração, dados, serializar)
+        self._ultimas = {}  # caminho -> geração da última marcação
+        self._em_gravacao = None  # geração do arquivo sendo gravado agora
+        self._erros = {}  # caminho -> última exceção ao gravar
+        self._falhas = 0
+        self._geracao = 0
+        self._ultima_marcacao = 0.0
+        self._urgente = False
+        self._ativo = True
+        self._thread = threading.Thread(target=self._executar, name='gravador-assincrono', daemon=True)
+        self._thread.start()
+
+    def marcar(self, caminho, dados, desde=None, serializar=None):
+        # `dados` é uma cópia serializável em JSON ou, com `serializar`, um
+        # valor imutável convertido na thread de gravação: ela nunca lê o
+        # estado vivo da interface. Retorna a geração desta marcação. Com
+        # `desde`, a marcação só vale se o arquivo não foi marcado depois dessa
+        # geração; senão retorna None.
+        with self._cond:
+            if not self._ativo:
+                raise RuntimeError("Gravador encerrado")
+            if desde is not None and self._ultimas.get(caminho, 0) > desde:
+                return None
+            self._geracao += 1
+            self._ultimas[caminho] = self._geracao
+            # Uma marcação nova substitui os dados, mas mantém a geração mais
+            # antiga ainda não gravada desse arquivo
+            geracao = self._pendentes[caminho][0] if caminho in self._pendentes else self._geracao
+            self._pendentes[caminho] = (geracao, dados, serializar)
+            self._ultima_marcacao = time.monotonic()
+            self._cond.notify_all()
+            return self._geracao
+
+    @property
+    def geracao(self):
+        with self._cond:
+            return self._geracao
+
+    @property
+    def pendentes(self):
+        with self._cond:
+            return list(self._pendentes)
+
+    @property
+    def erros(self):
+        with self._cond:
+            return dict(self._erros)
+
+    def _concluida(self):
+        # Maior geração g tal que toda marcação <= g já está em disco (com os
+        # próprios dados ou com os de uma marcação mais nova do mesmo arquivo)
+        abertas = [pendente[0] for pendente in self._pendentes.values()]
+        if self._em_gravacao is not None:
+            abertas.append(self._em_gravacao)
+        return min(abertas) - 1 if abertas else self._geracao
+
+    def gravado(self, geracao):
+        with self._cond:
+            return self._concluida() >= geracao
+
+    def descarregar(self, timeout=None):
+        # Grava tudo o que foi marcado até agora, sem esperar o debounce.
+        # Retorna False se alguma gravação falhar ou o tempo limite acabar.
+        with self._cond:
+            alvo = self._geracao
+            falhas = self._falhas
+            self._urgente = True
+            self._cond.notify_all()
+            self._cond.wait_for(lambda: self._concluida() >= alvo or self._falhas > falhas, timeout)
+            return self._concluida() >= alvo
+
+    def encerrar(self, timeout=None):
+        with self._cond:
+            self._ativo = False
+            self._urgente = True
+            self._cond.notify_all()
+        self._thread.join(timeout)
+
+    def _proximo(self):
+        with self._cond:
+            while not self._pendentes:
+                if not self._ativo:
+                    return None
+                self._urgente = False
+                self._cond.wait()
+            while not self._urgente:
+                restante = self._ultima_marcacao + self.atraso - time.monotonic()
+                if restante <= 0:
+                    break
+                self._cond.wait(restante)
+            caminho = min(self._pendentes, key=lambda c: self._pendentes[c][0])
+            geracao, dados, serializar = self._pendentes.pop(caminho)
+            self._em_gravacao = geracao
+            return caminho, geracao, dados, serializar
+
+    def _executar(self):
+        while True:
+            proximo = self._proximo()
+            if proximo is None:
+                return
+            caminho, geracao, dados, serializar = proximo
+            try:
+                gravar_json(caminho, serializar(dados) if serializar else dados)
+                erro = None
+            except Exception as e:
+                erro = e
+            with self._cond:
+                self._em_gravacao = None
+                if erro is None:
+                    self._erros.pop(caminho, None)
+                else:
+                    # Mantém o arquivo pendente (com os dados mais novos, se houver)
+                    # e tenta de novo depois do debounce; no encerramento desiste
+                    self._erros[caminho] = erro
+                    self._falhas += 1
+                    if self._ativo:
+                        if caminho in self._pendentes:
+                            dados, serializar = self._pendentes[caminho][1:]
+                        self._pendentes[caminho] = (geracao, dados, serializar)
+                        self._ultima_marcacao = time.monotonic()
+                        self._urgente = False
+                self._cond.notify_all()
+
+
+_gravador = None
+_gravador_lock = threading.Lock()
+
+def obter_gravador():
+    # Uma única thread por processo; o Streamlit reexecuta o script a cada
+    # interação, mas este módulo só é importado uma vez
+    global _gravador
+    with _gravador_lock:
+        if _gravador is None:
+            _gravador = GravadorAssincrono()
+            atexit.register(_gravador.encerrar)
+        return _gravador
@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from agendador import reagendar
+from calendario import CalendarioProducao
+from persistencia import carregar_json, gravar_json, plano_para_json, pedidos_de_json, datas_de_json
+
+# Plantas (fábricas). Cada planta tem o seu próprio plano: histórico de
+# pedidos com a configuração de capacidade, dias bloqueados e regras de
+# calendário. O cadastro de peças é compartilhado por todas.
+#
+# A planta padrão usa os arquivos da pasta de trabalho, como antes; as demais
+# ficam em plantas/<nome>/.
+#
+# Revisão do plano: contador por planta, no processo do servidor, que muda
+# sempre que o plano é regravado por fora da sessão (reagendamento das
+# plantas). Uma sessão com revisão antiga recarrega o plano do disco antes de
+# gravar qualquer coisa por cima.
+
+PLANTA_PADRAO = 'principal'
+PASTA_PLANTAS = 'plantas'
+PARTS_FILE = 'cadastro_pecas.json'
+
+def caminhos_da_planta(planta):
+    pasta = '.' if planta == PLANTA_PADRAO else os.path.join(PASTA_PLANTAS, planta)
+    return {
+        'pasta': pasta,
+        'historico': os.path.join(pasta, 'historico_pedidos.json'),
+        'bloqueados': os.path.join(pasta, 'dias_bloqueados.json'),
+        'regras': os.path.join(pasta, 'calendario_regras.json'),
+    }
+
+def listar_plantas():
+    plantas = [PLANTA_PADRAO]
+    if os.path.isdir(PASTA_PLANTAS):
+        plantas += sorted(
+            nome for nome in os.listdir(PASTA_PLANTAS)
+            if os.path.isdir(os.path.join(PASTA_PLANTAS, nome)) and nome != PLANTA_PADRAO
+        )
+    return plantas
+
+def criar_planta(nome):
+    nome = nome.strip()
+    if not re.fullmatch(r'[\w\- ]+', nome) or nome == PLANTA_PADRAO:
+        raise ValueError(f"Nome de planta inválido: {nome}")
+    os.makedirs(caminhos_da_planta(nome)['pasta'], exist_ok=True)
+    return nome
+
+def carregar_plano(planta):
+    caminhos = caminhos_da_planta(planta)
+    data = carregar_json(caminhos['historico'])
+    config = data['config'] if data else {}
+    orders = pedidos_de_json(data['orders']) if data else []
+    blocked_days = datas_de_json(carregar_json(caminhos['bloqueados'], []))
+    calendario = CalendarioProducao(carregar_json(caminhos['regras'], []), blocked_days, config.get('region'))
+    return config, orders, blocked_days, calendario
+
+_revisoes = {}
+_revisoes_lock = threading.Lock()
+
+def revisao_do_plano(planta):
+    with _revisoes_lock:
+        return _revisoes.get(planta, 0)
+
+def nova_revisao(planta):
+    with _revisoes_lock:
+        _revisoes[planta] = _revisoes.get(planta, 0) + 1
+        return _revisoes[planta]
+
+def resumir_plano(planta, config, orders):
+    # Agregados de uma planta; consolidar() soma os resumos de todas
+    por_mes = {}
+    for order in orders:
+        mes = order['end_date'].strftime('%Y-%m')
+        minutos, pedidos = por_mes.get(mes, (0, 0))
+        por_mes[mes] = (minutos + order['total_minutes'], pedidos + 1)
+
+    capacidade = 0
+    if config.get('config_saved'):
+        capacidade = config['workers'] * config['minutes_per_day'] * (config['efficiency'] / 100)
+
+    return {
+        'plantas': [planta],
+        'pedidos': len(orders),
+        'minutos': sum(order['total_minutes'] for order in orders),
+        'capacidade_diaria': capacidade,
+        'inicio': min((order['start_date'] for order in orders), default=None),
+        'fim': max((order['end_date'] for order in orders), default=None),
+        'por_mes': por_mes,
+        'erro': None,
+    }
+
+def consolidar(resumos):
+    total = {
+        'plantas': [],
+        'pedidos': 0,
+        'minutos': 0,
+        'capacidade_diaria': 0,
+        'inicio': None,
+        'fim': None,
+        'por_mes': {},
+        'erro': None,
+    }
+    for resumo in resumos:
+        total['plantas'] += resumo['plantas']
+        total['pedidos'] += resumo['pedidos']
+        total['minutos'] += resumo['minutos']
+        total['capacidade_diaria'] += resumo['capacidade_diaria']
+        if resumo['inicio'] and (total['inicio'] is None or resumo['inicio'] < total['inicio']):
+            total['inicio'] = resumo['inicio']
+        if resumo['fim'] and (total['fim'] is None or resumo['fim'] > total['fim']):
+            total['fim'] = resumo['fim']
+        for mes, (minutos, pedidos) in resumo['por_mes'].items():
+            soma_minutos, soma_pedidos = total['por_mes'].get(mes, (0, 0))
+            total['por_mes'][mes] = (soma_minutos + minutos, soma_pedidos + pedidos)
+    total['por_mes'] = dict(sorted(total['por_mes'].items()))
+    return total
+
+def reagendar_planta(planta):
+    # Executado em um processo do pool: só lê os arquivos da planta e devolve
+    # (resumo, dados a gravar ou None). A gravação fica com o processo principal.
+    config, orders, _, calendario = carregar_plano(planta)
+    dados = None
+    if orders and config.get('config_saved'):
+        reagendar(orders, config, calendario, 0, orders[0]['start_date'])
+        dados = plano_para_json(config, orders)
+    return resumir_plano(planta, config, orders), dados
+
+def reagendar_plantas(plantas=None, max_workers=None, gravar=gravar_json, processos=True):
+    # Reagenda todas as plantas em paralelo e retorna (resumos, consolidado).
+    # Uma falha em uma planta não interrompe as demais. `gravar(caminho, dados)`
+    # recebe cada plano reagendado (na interface, o gravador em segundo plano)
+    # e a revisão da planta avança para as outras sessões recarregarem.
+    #
+    # Os processos são criados com 'spawn': o servidor do Streamlit tem várias
+    # threads e um fork copiaria locks no meio do uso.
+    plantas = plantas if plantas is not None else listar_plantas()
+    if processos:
+        pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+    else:
+        pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    resumos = []
+    with pool:
+        futuros = [(planta, pool.submit(reagendar_planta, planta)) for planta in plantas]
+        for planta, futuro in futuros:
+            try:
+                resumo, dados = futuro.result()
+                if dados is not None:
+                    gravar(caminhos_da_planta(planta)['historico'], dados)
+                    nova_revisao(planta)
+            except Exception as e:
+                resumo = resumir_plano(planta, {}, [])
+                resumo['erro'] = str(e)
+            resumos.append(resumo)
+
+    return resumos, consolidar(resumos)
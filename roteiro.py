@@ -0,0 +1,170 @@
+import heapq
+import math
+
+# Agendamento por operação. Uma peça pode ter um roteiro (sequência de
+# operações, cada uma com minutos por unidade e centro de trabalho):
+#   'routing': [{'operation': 'Corte', 'work_center': 'Corte', 'time_minutes': 2}, ...]
+# Cada item de pedido vira uma tarefa que percorre seu roteiro em ordem. Cada
+# centro processa uma operação por vez com a sua capacidade diária, então itens
+# diferentes avançam em paralelo por centros diferentes (pipeline).
+#
+# A simulação é orientada a eventos: o tempo é medido em dias úteis (fração
+# de dia = fração da capacidade diária do centro) e só avança de um término de
+# operação para o próximo, em O(E log E) para E operações.
+#
+# Os centros trabalham ao mesmo tempo, então dividem os trabalhadores da
+# planta entre si: ninguém conta em dois centros (ver capacidades_dos_centros).
+
+CENTRO_PADRAO = 'Geral'
+
+def parse_routing(texto):
+    # Uma operação por linha: "Operação; Centro; minutos por unidade"
+    routing = []
+    for linha in texto.splitlines():
+        if not linha.strip():
+            continue
+        partes = [p.strip() for p in linha.split(';')]
+        if len(partes) != 3 or not partes[0] or not partes[1]:
+            raise ValueError(f"Linha de roteiro inválida: {linha}")
+        if partes[1] == CENTRO_PADRAO:
+            # O centro padrão tem a regra de dias inteiros dos itens sem roteiro
+            raise ValueError(f"O centro {CENTRO_PADRAO} é reservado aos itens sem roteiro: {linha}")
+        minutos = float(partes[2].replace(',', '.'))
+        if minutos < 0:
+            raise ValueError(f"Tempo negativo no roteiro: {linha}")
+        routing.append({'operation': partes[0], 'work_center': partes[1], 'time_minutes': minutos})
+    return routing
+
+def operacoes_do_item(item):
+    # Lista de (centro, minutos de trabalho) de um item com roteiro
+    return [(op['work_center'], item['quantity'] * op['time_minutes']) for op in item['routing']]
+
+def minutos_sem_roteiro(order):
+    # Trabalho dos itens sem roteiro, feito em bloco no centro padrão
+    items = order.get('items', [])
+    if not any(item.get('routing') for item in items):
+        return order['total_minutes']
+    return sum(item['total_time'] for item in items if not item.get('routing'))
+
+def plano_usa_roteiro(orders):
+    return any(item.get('routing') for order in orders for item in order.get('items', []))
+
+def usa_centro_padrao(order):
+    return bool(minutos_sem_roteiro(order)) or not plano_usa_roteiro([order])
+
+def centros_do_plano(parts):
+    centros = []
+    for part in parts:
+        for op in part.get('routing') or []:
+            if op['work_center'] not in centros:
+                centros.append(op['work_center'])
+    return centros
+
+def capacidades_dos_centros(orders, workers, work_centers, minutos_por_trabalhador):
+    # Minutos por dia de cada centro usado em `orders`. Os trabalhadores da
+    # planta são divididos: centros configurados em `work_centers` usam o
+    # próprio número; os demais centros e o centro padrão (se algum pedido tem
+    # itens sem roteiro) dividem por igual o tempo dos que sobram. Sem
+    # roteiros, o centro padrão fica com todos.
+    centros = centros_do_plano(item for order in orders for item in order.get('items', []))
+    trabalhadores = {c: work_centers[c] for c in centros if c in work_centers}
+    restantes = workers - sum(trabalhadores.values())
+    if restantes < 0:
+        raise ValueError("Os centros de trabalho somam mais trabalhadores que a planta")
+
+    sem_configuracao = [c for c in centros if c not in trabalhadores]
+    if any(usa_centro_padrao(order) for order in orders):
+        sem_configuracao.append(CENTRO_PADRAO)
+    for centro in sem_configuracao:
+        trabalhadores[centro] = restantes / len(sem_configuracao)
+
+    return {centro: n * minutos_por_trabalhador for centro, n in trabalhadores.items()}
+
+def simular(orders, capacidades):
+    # Retorna, para cada pedido, (início, fim) em dias úteis a partir do início
+    # do plano. `capacidades` mapeia centro -> minutos por dia (ver
+    # capacidades_dos_centros). A prioridade segue a ordem da fila de pedidos.
+    #
+    # O centro padrão segue a mesma regra do agendamento sequencial: cada
+    # pedido ocupa dias inteiros e o próximo começa no dia útil seguinte à data
+    # de fim. Assim, um plano sem roteiros tem as mesmas datas nos dois modos.
+    def capacidade(centro):
+        cap = capacidades.get(centro)
+        if not cap or cap <= 0:
+            raise ValueError(f"Centro de trabalho sem capacidade: {centro}")
+        return cap
+
+    def duracao(centro, minutos):
+        cap = capacidade(centro)
+        if centro == CENTRO_PADRAO:
+            return int((minutos + cap - 1) // cap)
+        return minutos / cap
+
+    tarefas = {}
+    filas = {}
+    livres = {}
+    eventos = []
+    sequencia = 0
+    resultado = [[math.inf, 0.0] for _ in orders]
+
+    def agendar_evento(tempo, tipo, dados):
+        nonlocal sequencia
+        sequencia += 1
+        heapq.heappush(eventos, (tempo, sequencia, tipo, dados))
+
+    def liberar(tarefa, passo):
+        centro = tarefas[tarefa][passo][0]
+        heapq.heappush(filas.setdefault(centro, []), (tarefa, passo))
+        livres.setdefault(centro, True)
+        return centro
+
+    def despachar(centro, agora):
+        if not livres[centro] or not filas[centro]:
+            return
+        tarefa, passo = heapq.heappop(filas[centro])
+        fim = agora + duracao(centro, tarefas[tarefa][passo][1])
+        livres[centro] = False
+        pedido = tarefa[0]
+        resultado[pedido][0] = min(resultado[pedido][0], agora)
+        agendar_evento(fim, 'fim', (tarefa, passo, centro))
+
+    # Tarefa = (posição do pedido, posição do item): a menor tem prioridade.
+    # Os itens sem roteiro de um pedido formam uma única tarefa (item -1).
+    for p, order in enumerate(orders):
+        if usa_centro_padrao(order):
+            tarefas[(p, -1)] = [(CENTRO_PADRAO, minutos_sem_roteiro(order))]
+            liberar((p, -1), 0)
+        for i, item in enumerate(order.get('items', [])):
+            if item.get('routing'):
+                tarefas[(p, i)] = operacoes_do_item(item)
+                liberar((p, i), 0)
+    for centro in filas:
+        despachar(centro, 0.0)
+
+    while eventos:
+        agora, _, tipo, dados = heapq.heappop(eventos)
+        if tipo == 'livre':
+            livres[dados] = True
+            despachar(dados, agora)
+            continue
+
+        tarefa, passo, centro = dados
+        pedido = tarefa[0]
+        resultado[pedido][1] = max(resultado[pedido][1], agora)
+        if passo + 1 < len(tarefas[tarefa]):
+            despachar(liberar(tarefa, passo + 1), agora)
+        if centro == CENTRO_PADRAO:
+            # O dia da data de fim fica reservado, como no agendamento sequencial
+            agendar_evento(agora + 1, 'livre', centro)
+        else:
+            livres[centro] = True
+            despachar(centro, agora)
+
+    return [(0.0 if inicio == math.inf else inicio, fim) for inicio, fim in resultado]
+
+def dias_do_intervalo(inicio, fim):
+    # Converte o intervalo contínuo em (dia útil de início, dias necessários),
+    # com a mesma convenção do agendamento sequencial: data de fim = início
+    # avançado de `dias necessários` dias úteis
+    dia_inicio = int(inicio)
+    return dia_inicio, max(math.ceil(fim) - dia_inicio, 0)
@@ -3,8 +3,17 @@ from datetime import datetime, timedelta
 import calendar
 import pandas as pd
 import json
-import os
 import locale
+from bisect import insort
+from itertools import islice
+
+from historico import HistoricoEdicoes, VetorPersistente, pedido_de_base, posicao_a_recalcular
+from calendario import FERIADOS_NACIONAIS, TIPOS_REGRA, regras_de_datas, descrever_regra
+from persistencia import obter_gravador, carregar_json, instantaneo_para_json, datas_para_json
+from roteiro import CENTRO_PADRAO, parse_routing, plano_usa_roteiro, centros_do_plano
+from agendador import calcular_data_fim, reagendar
+from plantas import (PLANTA_PADRAO, PARTS_FILE, caminhos_da_planta, listar_plantas, criar_planta,
+                     carregar_plano, revisao_do_plano, reagendar_plantas)
 
 # Configurar locale para português
 try:
@@ -17,89 +26,122 @@ except:
 
 st.set_page_config(page_title="Sistema de Agendamento de Produção", page_icon="📦", layout="wide")
 
-HISTORY_FILE = "historico_pedidos.json"
-PARTS_FILE = "cadastro_pecas.json"
-BLOCKED_DAYS_FILE = "dias_bloqueados.json"
+# Cada planta tem seus próprios arquivos; o cadastro de peças é compartilhado
+if 'plant' not in st.session_state:
+    st.session_state.plant = PLANTA_PADRAO
+
+PLANT_FILES = caminhos_da_planta(st.session_state.plant)
+HISTORY_FILE = PLANT_FILES['historico']
+BLOCKED_DAYS_FILE = PLANT_FILES['bloqueados']
+CALENDAR_RULES_FILE = PLANT_FILES['regras']
+
+# Gravação em segundo plano: os save_* passam ao gravador uma cópia ou um
+# instantâneo imutável dos dados, e ele grava em outra thread depois do debounce
+writer = obter_gravador()
 
 # Funções de persistência
 def save_parts_to_file():
-    with open(PARTS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(st.session_state.parts, f, indent=4, ensure_ascii=False)
-
-def load_parts_from_file():
-    if os.path.exists(PARTS_FILE):
-        try:
-            with open(PARTS_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except:
-            return []
-    return []
+    writer.marcar(PARTS_FILE, [dict(part) for part in st.session_state.parts])
 
 def save_blocked_days():
-    blocked_dates = [d.strftime('%Y-%m-%d') for d in st.session_state.blocked_days]
-    with open(BLOCKED_DAYS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(blocked_dates, f, indent=4)
+    # O conjunto persistente do histórico tem os mesmos dias, em ordem
+    writer.marcar(BLOCKED_DAYS_FILE, st.session_state.history.atual.bloqueados, serializar=datas_para_json)
 
-def load_blocked_days():
-    if os.path.exists(BLOCKED_DAYS_FILE):
-        try:
-            with open(BLOCKED_DAYS_FILE, 'r', encoding='utf-8') as f:
-                blocked_dates = json.load(f)
-            return [datetime.strptime(d, '%Y-%m-%d').date() for d in blocked_dates]
-        except:
-            return []
-    return []
-
-def save_to_file():
-    data = {
-        'config': {
-            'workers': st.session_state.workers,
-            'minutes_per_day': st.session_state.minutes_per_day,
-            'efficiency': st.session_state.efficiency,
-            'config_saved': st.session_state.config_saved
-        },
-        'orders': []
+def save_calendar_rules():
+    writer.marcar(CALENDAR_RULES_FILE, [dict(rule) for rule in st.session_state.calendar.regras])
+
+def current_config():
+    return {
+        'workers': st.session_state.workers,
+        'minutes_per_day': st.session_state.minutes_per_day,
+        'efficiency': st.session_state.efficiency,
+        'config_saved': st.session_state.config_saved,
+        'work_centers': dict(st.session_state.work_centers),
+        'region': st.session_state.region
     }
-    
-    for order in st.session_state.orders:
-        order_copy = order.copy()
-        order_copy['start_date'] = order['start_date'].strftime('%Y-%m-%d')
-        order_copy['end_date'] = order['end_date'].strftime('%Y-%m-%d')
-        data['orders'].append(order_copy)
-    
-    with open(HISTORY_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
 
-def load_from_file():
-    if os.path.exists(HISTORY_FILE):
-        try:
-            with open(HISTORY_FILE, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            return data
-        except:
-            return None
-    return None
+def plan_dates(order):
+    return (order['start_date'], order['end_date'], order['days_needed'])
+
+def sync_plan_dates(first_changed):
+    # plan_dates acompanha as datas dos pedidos em um VetorPersistente; só as
+    # posições a partir de `first_changed` são regravadas, em O(log n) cada
+    orders = st.session_state.orders
+    dates = st.session_state.plan_dates
+    while len(dates) > len(orders):
+        dates = dates.remover(len(dates) - 1)
+    for idx in range(first_changed, len(orders)):
+        dates = dates.substituir(idx, plan_dates(orders[idx])) if idx < len(dates) else dates.anexar(plan_dates(orders[idx]))
+    st.session_state.plan_dates = dates
+
+def save_to_file(first_changed=0):
+    # O instantâneo é a fila persistente do histórico com o vetor de datas:
+    # montá-lo não copia o plano, e o JSON é gerado na thread de gravação
+    sync_plan_dates(first_changed)
+    snapshot = (current_config(), st.session_state.history.atual.pedidos, st.session_state.plan_dates)
+    writer.marcar(HISTORY_FILE, snapshot, serializar=instantaneo_para_json)
+
+# Estado do plano na sessão; ao trocar de planta ele fica guardado em
+# plant_sessions, com o histórico de desfazer/refazer e os itens em edição
+PLAN_KEYS = ['orders', 'blocked_days', 'calendar', 'history', 'workers', 'minutes_per_day', 'efficiency',
+             'config_saved', 'work_centers', 'region', 'temp_items', 'plan_revision', 'plan_dates']
+
+def load_plan_state():
+    # A revisão é lida antes dos arquivos: uma regravação durante a leitura
+    # provoca outra recarga em vez de passar despercebida
+    st.session_state.plan_revision = revisao_do_plano(st.session_state.plant)
+    config, orders, blocked_days, calendar = carregar_plano(st.session_state.plant)
+    st.session_state.workers = config.get('workers')
+    st.session_state.minutes_per_day = config.get('minutes_per_day')
+    st.session_state.efficiency = config.get('efficiency')
+    st.session_state.work_centers = config.get('work_centers', {})
+    st.session_state.config_saved = config.get('config_saved', False)
+    st.session_state.region = config.get('region')
+    st.session_state.orders = orders
+    st.session_state.plan_dates = VetorPersistente(plan_dates(order) for order in orders)
+    st.session_state.blocked_days = blocked_days
+    calendar.compilar_horizonte()
+    st.session_state.calendar = calendar
+
+def reset_history():
+    st.session_state.history = HistoricoEdicoes(st.session_state.orders, st.session_state.blocked_days)
+
+def same_queue(bases, orders):
+    # Mesma fila: mesmo pedido (id, nome e itens) em cada posição
+    return len(bases) == len(orders) and all(
+        (base.get('id'), base.get('name'), list(base['items'])) == (order.get('id'), order.get('name'), order['items'])
+        for base, order in zip(bases, orders)
+    )
+
+def reload_plan_state():
+    # O plano foi regravado por fora desta sessão. O histórico continua valendo
+    # se a fila e os dias bloqueados são os mesmos (só as datas mudaram).
+    history = st.session_state.history
+    load_plan_state()
+    if (same_queue(history.atual.pedidos, st.session_state.orders)
+            and set(history.atual.bloqueados) == set(st.session_state.blocked_days)):
+        return
+    reset_history()
+    st.warning("⚠️ O plano desta planta foi alterado em outra sessão e recarregado. O histórico de desfazer/refazer foi reiniciado.")
+
+def switch_plant(plant):
+    sessions = st.session_state.plant_sessions
+    sessions[st.session_state.plant] = {key: st.session_state[key] for key in PLAN_KEYS}
+    st.session_state.plant = plant
+    if plant in sessions:
+        for key, value in sessions.pop(plant).items():
+            st.session_state[key] = value
+    else:
+        load_plan_state()
+        reset_history()
+        st.session_state.temp_items = []
+    st.rerun()
 
 def is_working_day(date):
-    if date.weekday() >= 5:
-        return False
-    if date.date() in st.session_state.blocked_days:
-        return False
-    return True
+    return st.session_state.calendar.dia_util(date)
 
 def calculate_end_date(start_date, total_minutes, workers, effective_minutes):
-    daily_capacity = workers * effective_minutes
-    days_needed = int((total_minutes + daily_capacity - 1) // daily_capacity)
-    
-    current_date = start_date
-    work_days = 0
-    
-    while work_days < days_needed:
-        current_date += timedelta(days=1)
-        if is_working_day(current_date):
-            work_days += 1
-    
-    return current_date, days_needed
+    return calcular_data_fim(st.session_state.calendar, start_date, total_minutes, workers, effective_minutes)
 
 def calculate_next_available_date(custom_start=None):
     if custom_start:
@@ -110,41 +152,70 @@ def calculate_next_available_date(custom_start=None):
         last_end_date = max(order['end_date'] for order in st.session_state.orders)
         current_date = last_end_date + timedelta(days=1)
     
-    while not is_working_day(current_date):
-        current_date += timedelta(days=1)
-    
-    return current_date
+    return st.session_state.calendar.proximo_dia_util(current_date)
 
 def recalculate_all_dates(start_date=None):
+    return recalculate_dates_from(0, start_date)
+
+def recalculate_plan():
+    recalculate_all_dates(st.session_state.orders[0]['start_date'] if st.session_state.orders else None)
+
+def add_calendar_rules(rules):
+    # Uma regra que deixa o plano sem dias úteis no horizonte faz o reagendamento
+    # falhar: nesse caso as regras novas são desfeitas antes de gravar
+    calendar = st.session_state.calendar
+    previous_count = len(calendar.regras)
+    try:
+        for rule in rules:
+            calendar.adicionar_regra(rule)
+        recalculate_plan()
+    except ValueError:
+        while len(calendar.regras) > previous_count:
+            calendar.remover_regra(len(calendar.regras) - 1)
+        recalculate_plan()
+        raise
+    save_calendar_rules()
+    save_to_file()
+
+def recalculate_dates_from(index, start_date=None):
+    # Recalcula apenas os pedidos a partir de `index`; os anteriores mantêm as
+    # datas. Retorna a primeira posição com datas novas (com roteiros, 0).
     if not st.session_state.orders or not st.session_state.config_saved:
-        return
-    
-    effective_minutes = st.session_state.minutes_per_day * (st.session_state.efficiency / 100)
+        return len(st.session_state.orders)
     
-    if start_date is None:
-        current_date = datetime.now()
-    else:
-        current_date = start_date
-    
-    while not is_working_day(current_date):
-        current_date += timedelta(days=1)
-    
-    for order in st.session_state.orders:
-        order['start_date'] = current_date
-        
-        end_date, days_needed = calculate_end_date(
-            current_date,
-            order['total_minutes'],
-            st.session_state.workers,
-            effective_minutes
-        )
-        
-        order['end_date'] = end_date
-        order['days_needed'] = days_needed
-        
-        current_date = end_date + timedelta(days=1)
-        while not is_working_day(current_date):
-            current_date += timedelta(days=1)
+    return reagendar(st.session_state.orders, current_config(), st.session_state.calendar, index, start_date)
+
+def apply_history_state(previous, state):
+    orders = st.session_state.orders
+    first_changed = posicao_a_recalcular(previous, state, orders)
+    
+    anchor = orders[0]['start_date'] if orders else None
+    st.session_state.blocked_days = list(state.bloqueados)
+    st.session_state.calendar.definir_datas_bloqueadas(st.session_state.blocked_days)
+    st.session_state.orders = orders[:first_changed] + [
+        pedido_de_base(base) for base in islice(state.pedidos, first_changed, None)
+    ]
+    
+    recalculated = first_changed
+    if first_changed < len(st.session_state.orders):
+        if first_changed == 0 and anchor is None:
+            anchor = st.session_state.orders[0]['start_date']
+        recalculated = min(first_changed, recalculate_dates_from(first_changed, anchor))
+    
+    save_to_file(recalculated)
+    save_blocked_days()
+
+def undo_last_edit():
+    previous = st.session_state.history.atual
+    state = st.session_state.history.desfazer()
+    if state is not None:
+        apply_history_state(previous, state)
+
+def redo_last_edit():
+    previous = st.session_state.history.atual
+    state = st.session_state.history.refazer()
+    if state is not None:
+        apply_history_state(previous, state)
 
 def create_month_calendar(month_date, orders):
     year = month_date.year
@@ -178,7 +249,7 @@ def create_month_calendar(month_date, orders):
             else:
                 day = current_date.day
                 is_weekend = current_date.weekday() >= 5
-                is_blocked = current_date in st.session_state.blocked_days
+                is_blocked = not is_weekend and not is_working_day(current_date)
                 
                 is_start = False
                 is_end = False
@@ -225,39 +296,29 @@ def create_month_calendar(month_date, orders):
 
 # Inicializar session state
 if 'initialized' not in st.session_state:
-    st.session_state.parts = load_parts_from_file()
-    st.session_state.blocked_days = load_blocked_days()
-    st.session_state.orders = []
-    st.session_state.config_saved = False
-    st.session_state.workers = None
-    st.session_state.minutes_per_day = None
-    st.session_state.efficiency = None
+    st.session_state.parts = carregar_json(PARTS_FILE, [])
     st.session_state.temp_items = []
-    
-    # Carregar dados salvos
-    saved_data = load_from_file()
-    if saved_data:
-        st.session_state.workers = saved_data['config'].get('workers')
-        st.session_state.minutes_per_day = saved_data['config'].get('minutes_per_day')
-        st.session_state.efficiency = saved_data['config'].get('efficiency')
-        st.session_state.config_saved = saved_data['config'].get('config_saved', False)
-        
-        for order in saved_data['orders']:
-            order_copy = order.copy()
-            order_copy['start_date'] = datetime.strptime(order['start_date'], '%Y-%m-%d')
-            order_copy['end_date'] = datetime.strptime(order['end_date'], '%Y-%m-%d')
-            if 'items' not in order_copy:
-                order_copy['items'] = [{
-                    'part_name': 'Item Genérico',
-                    'part_ref': 'N/A',
-                    'quantity': 1,
-                    'time_per_unit': order_copy.get('total_minutes', 0),
-                    'total_time': order_copy.get('total_minutes', 0),
-                    'production_order': 'N/A'
-                }]
-            st.session_state.orders.append(order_copy)
-    
+    st.session_state.plant_sessions = {}
+    load_plan_state()
+    reset_history()
     st.session_state.initialized = True
+elif st.session_state.plan_revision != revisao_do_plano(st.session_state.plant):
+    reload_plan_state()
+
+# Seleção de planta
+with st.sidebar:
+    st.header("🏭 Planta")
+    plants = listar_plantas()
+    selected_plant = st.selectbox("Planta ativa", plants, index=plants.index(st.session_state.plant), key="select_plant")
+    if selected_plant != st.session_state.plant:
+        switch_plant(selected_plant)
+    
+    new_plant = st.text_input("Nova planta", placeholder="Ex: Filial Sul", key="new_plant")
+    if st.button("➕ Criar Planta", key="create_plant"):
+        try:
+            switch_plant(criar_planta(new_plant))
+        except ValueError:
+            st.error("❌ Nome de planta inválido!")
 
 # Interface
 col_logo, col_title = st.columns([1, 5])
@@ -273,6 +334,9 @@ with col_title:
 
 st.markdown("---")
 
+for failed_file, error in writer.erros.items():
+    st.error(f"❌ Falha ao gravar {failed_file}: {error}. Nova tentativa em instantes.")
+
 st.markdown("""
     <style>
     .stTabs [data-baseweb="tab-list"] {gap: 8px; background-color: #f0f2f6; padding: 10px; border-radius: 10px;}
@@ -286,7 +350,17 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs(["🏭 Pedidos", "⚙️ Configuração",
 
 # ABA 1: PEDIDOS
 with tab1:
-    st.caption(f"📋 Pedidos: {len(st.session_state.orders)} | Peças: {len(st.session_state.parts)} | Bloqueados: {len(st.session_state.blocked_days)}")
+    col_info, col_undo, col_redo = st.columns([4, 1, 1])
+    with col_info:
+        st.caption(f"📋 Pedidos: {len(st.session_state.orders)} | Peças: {len(st.session_state.parts)} | Bloqueados: {len(st.session_state.blocked_days)}")
+    with col_undo:
+        if st.button("↩️ Desfazer", key="undo", disabled=not st.session_state.history.pode_desfazer):
+            undo_last_edit()
+            st.rerun()
+    with col_redo:
+        if st.button("↪️ Refazer", key="redo", disabled=not st.session_state.history.pode_refazer):
+            redo_last_edit()
+            st.rerun()
     st.markdown("---")
     
     if not st.session_state.config_saved:
@@ -340,6 +414,8 @@ with tab1:
                         'total_time': quantity * part['time_minutes'],
                         'production_order': part['production_order']
                     }
+                    if part.get('routing'):
+                        item['routing'] = part['routing']
                     st.session_state.temp_items.append(item)
                     st.rerun()
             
@@ -359,34 +435,59 @@ with tab1:
                 st.info(f"⏱️ **Total do Pedido: {total_minutes} minutos ({total_minutes/60:.1f} horas)**")
                 
                 start_datetime = datetime.combine(custom_start_date, datetime.min.time())
-                end_date, days_needed = calculate_end_date(
-                    start_datetime,
-                    total_minutes,
-                    st.session_state.workers,
-                    effective_minutes
-                )
+                draft_order = {'items': st.session_state.temp_items, 'total_minutes': total_minutes}
                 
-                st.info(f"📅 **Início: {start_datetime.strftime('%d/%m/%Y')} | Fim: {end_date.strftime('%d/%m/%Y')} | Dias úteis: {days_needed}**")
+                preview_error = None
+                if plano_usa_roteiro(st.session_state.orders + [draft_order]):
+                    # Com roteiros as datas saem da simulação do plano inteiro; a
+                    # prévia simula uma cópia da fila com o pedido novo no fim
+                    preview_orders = [dict(o) for o in st.session_state.orders] + [draft_order]
+                    anchor = st.session_state.orders[0]['start_date'] if st.session_state.orders else start_datetime
+                    try:
+                        reagendar(preview_orders, current_config(), st.session_state.calendar, 0, anchor)
+                    except ValueError as e:
+                        preview_error = str(e)
+                        draft_order.update(start_date=start_datetime, end_date=start_datetime, days_needed=0)
+                    start_datetime = draft_order['start_date']
+                    end_date, days_needed = draft_order['end_date'], draft_order['days_needed']
+                    if st.session_state.orders:
+                        st.caption("ℹ️ Plano com roteiros: a data de início é definida pela simulação dos centros de trabalho; a data escolhida acima não é usada.")
+                else:
+                    end_date, days_needed = calculate_end_date(
+                        start_datetime,
+                        total_minutes,
+                        st.session_state.workers,
+                        effective_minutes
+                    )
                 
-                if st.button("✅ Finalizar e Adicionar Pedido", type="primary", key="finalize_order"):
-                    if not order_name:
-                        st.error("❌ Insira o nome do pedido!")
-                    else:
-                        order = {
-                            'id': len(st.session_state.orders) + 1,
-                            'name': order_name,
-                            'items': st.session_state.temp_items.copy(),
-                            'total_minutes': total_minutes,
-                            'start_date': start_datetime,
-                            'end_date': end_date,
-                            'days_needed': days_needed
-                        }
+                if preview_error:
+                    st.error(f"❌ {preview_error}. Ajuste os trabalhadores dos centros na aba de configuração.")
+                else:
+                    st.info(f"📅 **Início: {start_datetime.strftime('%d/%m/%Y')} | Fim: {end_date.strftime('%d/%m/%Y')} | Dias úteis: {days_needed}**")
+                
+                    if st.button("✅ Finalizar e Adicionar Pedido", type="primary", key="finalize_order"):
+                        if not order_name:
+                            st.error("❌ Insira o nome do pedido!")
+                        else:
+                            order = {
+                                'id': len(st.session_state.orders) + 1,
+                                'name': order_name,
+                                'items': st.session_state.temp_items.copy(),
+                                'total_minutes': total_minutes,
+                                'start_date': start_datetime,
+                                'end_date': end_date,
+                                'days_needed': days_needed
+                            }
                         
-                        st.session_state.orders.append(order)
-                        st.session_state.temp_items = []
-                        save_to_file()
-                        st.success(f"✅ Pedido '{order_name}' adicionado!")
-                        st.rerun()
+                            st.session_state.orders.append(order)
+                            st.session_state.history.adicionar_pedido(order)
+                            st.session_state.temp_items = []
+                            first_changed = len(st.session_state.orders) - 1
+                            if plano_usa_roteiro(st.session_state.orders):
+                                first_changed = recalculate_all_dates(st.session_state.orders[0]['start_date'])
+                            save_to_file(first_changed)
+                            st.success(f"✅ Pedido '{order_name}' adicionado!")
+                            st.rerun()
             
             st.markdown("---")
         
@@ -412,9 +513,13 @@ with tab1:
                         if st.button("⬆️ Subir", key="move_up"):
                             st.session_state.orders[order_to_move], st.session_state.orders[order_to_move-1] = \
                                 st.session_state.orders[order_to_move-1], st.session_state.orders[order_to_move]
-                            first_start = st.session_state.orders[0]['start_date']
-                            recalculate_all_dates(first_start)
-                            save_to_file()
+                            st.session_state.history.trocar_pedidos(order_to_move, order_to_move-1)
+                            # Os pedidos antes da troca mantêm as datas
+                            if order_to_move == 1:
+                                first_changed = recalculate_all_dates(st.session_state.orders[0]['start_date'])
+                            else:
+                                first_changed = recalculate_dates_from(order_to_move - 1)
+                            save_to_file(min(first_changed, order_to_move - 1))
                             st.rerun()
                 
                 with col3:
@@ -422,9 +527,13 @@ with tab1:
                         if st.button("⬇️ Descer", key="move_down"):
                             st.session_state.orders[order_to_move], st.session_state.orders[order_to_move+1] = \
                                 st.session_state.orders[order_to_move+1], st.session_state.orders[order_to_move]
-                            first_start = st.session_state.orders[0]['start_date']
-                            recalculate_all_dates(first_start)
-                            save_to_file()
+                            st.session_state.history.trocar_pedidos(order_to_move, order_to_move+1)
+                            # Os pedidos antes da troca mantêm as datas
+                            if order_to_move == 0:
+                                first_changed = recalculate_all_dates(st.session_state.orders[0]['start_date'])
+                            else:
+                                first_changed = recalculate_dates_from(order_to_move)
+                            save_to_file(min(first_changed, order_to_move))
                             st.rerun()
                 
                 with col4:
@@ -448,10 +557,13 @@ with tab1:
                     
                     if st.button(f"🗑️ Remover Pedido", key=f"rem_{idx}"):
                         st.session_state.orders.pop(idx)
-                        if st.session_state.orders:
-                            first_start = st.session_state.orders[0]['start_date']
-                            recalculate_all_dates(first_start)
-                        save_to_file()
+                        st.session_state.history.remover_pedido(idx)
+                        # Os pedidos antes do removido mantêm as datas
+                        if idx == 0:
+                            first_changed = recalculate_all_dates(st.session_state.orders[0]['start_date']) if st.session_state.orders else 0
+                        else:
+                            first_changed = recalculate_dates_from(idx)
+                        save_to_file(min(first_changed, idx))
                         st.rerun()
             
             st.markdown("---")
@@ -520,13 +632,48 @@ with tab2:
     
     st.markdown("---")
     
+    # Centros de trabalho usados nos roteiros das peças
+    work_centers_input = {}
+    centers = centros_do_plano(st.session_state.parts)
+    if centers:
+        st.subheader("🏗️ Centros de Trabalho")
+        st.caption(f"Os centros trabalham ao mesmo tempo e dividem os trabalhadores da planta. O centro {CENTRO_PADRAO} (itens sem roteiro) fica com os que sobram.")
+        # Sugestão inicial: divisão igual entre os centros e o centro padrão
+        default_center_workers = max(workers_input // (len(centers) + 1), 1)
+        center_cols = st.columns(min(len(centers), 4))
+        for idx, center in enumerate(centers):
+            with center_cols[idx % len(center_cols)]:
+                work_centers_input[center] = st.number_input(
+                    f"👥 {center}",
+                    min_value=1,
+                    value=int(st.session_state.work_centers.get(center, default_center_workers)),
+                    key=f"cfg_center_{center}"
+                )
+        st.markdown("---")
+    
     if st.button("💾 Salvar Configuração", type="primary", key="save_cfg"):
-        st.session_state.workers = workers_input
-        st.session_state.minutes_per_day = minutes_input
-        st.session_state.efficiency = efficiency_input
-        st.session_state.config_saved = True
-        save_to_file()
-        st.success("✅ Configuração salva com sucesso!")
+        if sum(work_centers_input.values()) > workers_input:
+            st.error("❌ Os centros de trabalho somam mais trabalhadores que a planta!")
+        else:
+            previous_config = current_config()
+            st.session_state.workers = workers_input
+            st.session_state.minutes_per_day = minutes_input
+            st.session_state.efficiency = efficiency_input
+            st.session_state.work_centers = work_centers_input
+            st.session_state.config_saved = True
+            try:
+                if st.session_state.orders:
+                    recalculate_all_dates(st.session_state.orders[0]['start_date'])
+            except ValueError as e:
+                # Um centro sem trabalhadores não consegue terminar o plano
+                for key, value in previous_config.items():
+                    st.session_state[key] = value
+                if st.session_state.orders and st.session_state.config_saved:
+                    recalculate_all_dates(st.session_state.orders[0]['start_date'])
+                st.error(f"❌ {e}")
+            else:
+                save_to_file()
+                st.success("✅ Configuração salva com sucesso!")
 
 # ABA 3: PEÇAS
 with tab3:
@@ -543,17 +690,33 @@ with tab3:
     with col4:
         part_order = st.text_input("Ordem Produção", key="part_order")
     
+    part_routing = st.text_area(
+        "Roteiro (opcional) - uma operação por linha: Operação; Centro; min/unidade",
+        placeholder="Corte; Corte; 1.5\nCostura; Costura; 4\nAcabamento; Acabamento; 1",
+        key="part_routing"
+    )
+    
     if st.button("➕ Adicionar Peça", type="primary", key="add_part"):
         if part_name and part_ref:
-            st.session_state.parts.append({
-                'name': part_name,
-                'reference': part_ref,
-                'time_minutes': part_time,
-                'production_order': part_order
-            })
-            save_parts_to_file()
-            st.success(f"✅ Peça '{part_name}' cadastrada!")
-            st.rerun()
+            try:
+                routing = parse_routing(part_routing)
+            except ValueError:
+                routing = None
+                st.error("❌ Roteiro inválido! Use: Operação; Centro; min/unidade")
+            if routing is not None:
+                part = {
+                    'name': part_name,
+                    'reference': part_ref,
+                    'time_minutes': part_time,
+                    'production_order': part_order
+                }
+                if routing:
+                    part['routing'] = routing
+                    part['time_minutes'] = sum(op['time_minutes'] for op in routing)
+                st.session_state.parts.append(part)
+                save_parts_to_file()
+                st.success(f"✅ Peça '{part_name}' cadastrada!")
+                st.rerun()
         else:
             st.error("❌ Preencha nome e referência!")
     
@@ -561,7 +724,10 @@ with tab3:
     
     if st.session_state.parts:
         st.subheader("Peças Cadastradas")
-        df_parts = pd.DataFrame(st.session_state.parts)
+        df_parts = pd.DataFrame([
+            {**part, 'routing': ' → '.join(f"{op['operation']} ({op['work_center']})" for op in part.get('routing', []))}
+            for part in st.session_state.parts
+        ])
         st.dataframe(df_parts, use_container_width=True, hide_index=True)
 
 # ABA 4: DIAS BLOQUEADOS
@@ -576,9 +742,10 @@ with tab4:
         st.write("")
         st.write("")
         if st.button("🚫 Bloquear Data", type="primary", key="block_date"):
-            if blocked_date not in st.session_state.blocked_days:
-                st.session_state.blocked_days.append(blocked_date)
-                st.session_state.blocked_days.sort()
+            if not st.session_state.calendar.data_bloqueada(blocked_date):
+                insort(st.session_state.blocked_days, blocked_date)
+                st.session_state.calendar.bloquear_data(blocked_date)
+                st.session_state.history.bloquear_dia(blocked_date)
                 save_blocked_days()
                 st.success(f"✅ Data bloqueada!")
                 st.rerun()
@@ -592,8 +759,123 @@ with tab4:
         blocked_df = pd.DataFrame([{
             'Data': d.strftime('%d/%m/%Y'),
             'Dia': ['Seg', 'Ter', 'Qua', 'Qui', 'Sex', 'Sáb', 'Dom'][d.weekday()]
-        } for d in sorted(st.session_state.blocked_days)])
+        } for d in st.session_state.blocked_days])
         st.dataframe(blocked_df, use_container_width=True, hide_index=True)
+    
+    st.markdown("---")
+    
+    # Regras de calendário (feriados, férias coletivas, paradas recorrentes)
+    st.header("🗓️ Regras de Calendário")
+    st.info("💡 Regras valem para todos os anos (ou apenas para os anos informados) e são aplicadas junto com os dias bloqueados. Regras com região só valem para planos dessa região.")
+    
+    col_region, col_region_btn = st.columns([2, 1])
+    with col_region:
+        plan_region = st.text_input("📍 Região do plano", value=st.session_state.region or "", placeholder="Ex: SP", key="plan_region")
+    with col_region_btn:
+        st.write("")
+        st.write("")
+        if st.button("💾 Salvar Região", key="save_region"):
+            previous_region = st.session_state.region
+            st.session_state.region = plan_region.strip() or None
+            st.session_state.calendar.definir_regiao(st.session_state.region)
+            try:
+                recalculate_plan()
+                save_to_file()
+                st.success("✅ Região salva!")
+                st.rerun()
+            except ValueError:
+                st.session_state.region = previous_region
+                st.session_state.calendar.definir_regiao(previous_region)
+                recalculate_plan()
+                st.error("❌ Com essa região não há dias úteis suficientes para o plano!")
+    
+    col1, col2, col3 = st.columns([2, 1, 1])
+    with col1:
+        rule_type = st.selectbox("Tipo de regra", list(TIPOS_REGRA), format_func=lambda t: TIPOS_REGRA[t], key="rule_type")
+    with col2:
+        rule_name = st.text_input("Nome", placeholder="Ex: Aniversário da cidade", key="rule_name")
+    with col3:
+        rule_region = st.text_input("Região (opcional)", placeholder="Ex: SP", key="rule_region")
+    
+    weekdays = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+    rule = {'tipo': rule_type, 'nome': rule_name or TIPOS_REGRA[rule_type]}
+    if rule_region.strip():
+        rule['regiao'] = rule_region.strip()
+    
+    if rule_type == 'feriado':
+        holiday_date = st.date_input("Dia e mês", key="rule_holiday")
+        rule['mes'], rule['dia'] = holiday_date.month, holiday_date.day
+    elif rule_type == 'movel':
+        rule['dias_pascoa'] = st.number_input("Dias em relação à Páscoa", value=0, step=1, key="rule_easter")
+    elif rule_type == 'periodo':
+        col_ini, col_fim = st.columns(2)
+        with col_ini:
+            rule['inicio'] = st.date_input("Início", key="rule_start").strftime('%Y-%m-%d')
+        with col_fim:
+            rule['fim'] = st.date_input("Fim", key="rule_end").strftime('%Y-%m-%d')
+    elif rule_type == 'semanal':
+        rule['dia_semana'] = st.selectbox("Dia da semana", range(7), format_func=lambda d: weekdays[d], key="rule_weekday")
+    elif rule_type == 'mensal':
+        col_ord, col_wd = st.columns(2)
+        with col_ord:
+            rule['ordem'] = st.selectbox("Ocorrência", [1, 2, 3, 4, -1], format_func=lambda o: 'Última' if o < 0 else f"{o}ª", key="rule_nth")
+        with col_wd:
+            rule['dia_semana'] = st.selectbox("Dia da semana", range(7), format_func=lambda d: weekdays[d], key="rule_month_weekday")
+    else:
+        rule['data'] = st.date_input("Data", key="rule_date").strftime('%Y-%m-%d')
+    
+    rule_years = st.text_input("Anos (opcional, separados por vírgula)", placeholder="Ex: 2026, 2027", key="rule_years")
+    
+    col_add, col_nat = st.columns(2)
+    with col_add:
+        if st.button("➕ Adicionar Regra", type="primary", key="add_rule"):
+            try:
+                if rule_years.strip():
+                    rule['anos'] = [int(a) for a in rule_years.split(',') if a.strip()]
+                add_calendar_rules([rule])
+                st.success("✅ Regra adicionada!")
+                st.rerun()
+            except ValueError:
+                st.error("❌ Regra inválida! Verifique os anos e datas informados; a regra não pode deixar o plano sem dias úteis.")
+    with col_nat:
+        if st.button("🇧🇷 Adicionar Feriados Nacionais", key="add_national"):
+            try:
+                add_calendar_rules([
+                    dict(holiday) for holiday in FERIADOS_NACIONAIS
+                    if holiday not in st.session_state.calendar.regras
+                ])
+                st.rerun()
+            except ValueError:
+                st.error("❌ Os feriados deixariam o plano sem dias úteis suficientes!")
+    
+    uploaded_blocked = st.file_uploader("📥 Importar dias_bloqueados.json como regras", type="json", key="import_blocked")
+    if uploaded_blocked is not None and st.button("📥 Importar", key="import_blocked_btn"):
+        try:
+            # Datas já cadastradas (de uma importação anterior) não se repetem
+            existing_rules = st.session_state.calendar.regras
+            new_rules = []
+            for imported_rule in regras_de_datas(json.load(uploaded_blocked)):
+                if imported_rule not in existing_rules and imported_rule not in new_rules:
+                    new_rules.append(imported_rule)
+            add_calendar_rules(new_rules)
+            st.success("✅ Dias importados!")
+            st.rerun()
+        except (ValueError, TypeError):
+            st.error("❌ Arquivo inválido! Esperada uma lista de datas AAAA-MM-DD.")
+    
+    if st.session_state.calendar.regras:
+        st.subheader("Regras Cadastradas")
+        for idx, saved_rule in enumerate(st.session_state.calendar.regras):
+            col_a, col_b = st.columns([5, 1])
+            with col_a:
+                st.write(f"• **{saved_rule.get('nome', '')}** - {descrever_regra(saved_rule)}")
+            with col_b:
+                if st.button("🗑️", key=f"del_rule_{idx}"):
+                    st.session_state.calendar.remover_regra(idx)
+                    save_calendar_rules()
+                    recalculate_plan()
+                    save_to_file()
+                    st.rerun()
 
 # ABA 5: RELATÓRIOS
 with tab5:
@@ -612,5 +894,61 @@ with tab5:
         if st.session_state.orders:
             st.info(f"{len(st.session_state.orders)} pedidos cadastrados")
 
+    st.markdown("---")
+
+    # Visão consolidada: cada planta é reagendada e resumida em paralelo e os
+    # resumos são somados
+    st.subheader("🏭 Visão Consolidada das Plantas")
+    if st.button("🔄 Reagendar Todas as Plantas", key="reschedule_plants"):
+        # Edições pendentes vão para o disco antes da leitura pelos processos, e
+        # os planos reagendados voltam pelo gravador; a revisão nova faz esta e
+        # as outras sessões recarregarem o plano mantendo o histórico
+        flushed = writer.geracao
+        if not writer.descarregar():
+            st.error("❌ Há alterações que ainda não foram gravadas em disco. Reagendamento cancelado; tente novamente.")
+        else:
+            def save_rescheduled(path, data):
+                # Um plano marcado depois da descarga é mais novo que o lido
+                # pelos processos: não é sobrescrito
+                if writer.marcar(path, data, desde=flushed) is None:
+                    raise ValueError("Plano alterado durante o reagendamento; reagende novamente")
+
+            plant_summaries, consolidated = reagendar_plantas(gravar=save_rescheduled)
+            writer.descarregar()
+            st.session_state.plant_summaries = plant_summaries
+            st.session_state.consolidated = consolidated
+            st.rerun()
+
+    if 'consolidated' in st.session_state:
+        consolidated = st.session_state.consolidated
+        col_p, col_o, col_m, col_c = st.columns(4)
+        with col_p:
+            st.metric("🏭 Plantas", len(consolidated['plantas']))
+        with col_o:
+            st.metric("📋 Pedidos", consolidated['pedidos'])
+        with col_m:
+            st.metric("⏱️ Carga Total", f"{consolidated['minutos']/60:.0f} h")
+        with col_c:
+            st.metric("⚡ Capacidade", f"{consolidated['capacidade_diaria']:.0f} min/dia")
+
+        plants_df = pd.DataFrame([{
+            'Planta': summary['plantas'][0],
+            'Pedidos': summary['pedidos'],
+            'Minutos': summary['minutos'],
+            'Capacidade (min/dia)': round(summary['capacidade_diaria']),
+            'Início': summary['inicio'].strftime('%d/%m/%Y') if summary['inicio'] else '-',
+            'Fim': summary['fim'].strftime('%d/%m/%Y') if summary['fim'] else '-',
+            'Erro': summary['erro'] or ''
+        } for summary in st.session_state.plant_summaries])
+        st.dataframe(plants_df, use_container_width=True, hide_index=True)
+
+        if consolidated['por_mes']:
+            monthly_df = pd.DataFrame([{
+                'Mês': month,
+                'Pedidos Concluídos': orders_count,
+                'Minutos': minutes
+            } for month, (minutes, orders_count) in consolidated['por_mes'].items()])
+            st.dataframe(monthly_df, use_container_width=True, hide_index=True)
+
 st.markdown("---")
 st.markdown('<div style="text-align: center; color: gray;"><p>Sistema v6.0 🚀</p></div>', unsafe_allow_html=True)
\ No newline at end of file
@@ -0,0 +1,136 @@
+import random
+from datetime import date, datetime, timedelta
+
+import pytest
+
+from calendario import FERIADOS_NACIONAIS, CalendarioProducao, mascara_regra, pascoa, regras_de_datas
+
+
+def dias_da_mascara(mascara, ano):
+    return [date(ano, 1, 1) + timedelta(days=i) for i in range(366) if mascara >> i & 1]
+
+
+def avancar_dia_a_dia(calendario, dia, quantidade):
+    while quantidade > 0:
+        dia += timedelta(days=1)
+        if calendario.dia_util(dia):
+            quantidade -= 1
+    return dia
+
+
+def test_pascoa():
+    assert pascoa(2024) == date(2024, 3, 31)
+    assert pascoa(2025) == date(2025, 4, 20)
+    assert pascoa(2026) == date(2026, 4, 5)
+    assert pascoa(2038) == date(2038, 4, 25)  # data mais tardia possível
+    assert pascoa(2285) == date(2285, 3, 22)  # data mais cedo possível
+    assert all(pascoa(ano).weekday() == 6 for ano in range(1900, 2200))
+
+
+def test_mascara_regra():
+    assert dias_da_mascara(mascara_regra({'tipo': 'feriado', 'mes': 12, 'dia': 25}, 2026), 2026) == [date(2026, 12, 25)]
+    assert mascara_regra({'tipo': 'feriado', 'mes': 2, 'dia': 29}, 2026) == 0
+    assert dias_da_mascara(mascara_regra({'tipo': 'feriado', 'mes': 2, 'dia': 29}, 2028), 2028) == [date(2028, 2, 29)]
+
+    assert dias_da_mascara(mascara_regra({'tipo': 'movel', 'dias_pascoa': -2}, 2026), 2026) == [date(2026, 4, 3)]
+    assert dias_da_mascara(mascara_regra({'tipo': 'movel', 'dias_pascoa': 60}, 2026), 2026) == [date(2026, 6, 4)]
+
+    assert dias_da_mascara(mascara_regra({'tipo': 'data', 'data': '2026-07-09'}, 2026), 2026) == [date(2026, 7, 9)]
+    assert mascara_regra({'tipo': 'data', 'data': '2026-07-09'}, 2027) == 0
+
+    # Período que atravessa o ano: cada ano recebe só a sua parte
+    periodo = {'tipo': 'periodo', 'inicio': '2026-12-28', 'fim': '2027-01-02'}
+    assert dias_da_mascara(mascara_regra(periodo, 2026), 2026) == [date(2026, 12, d) for d in range(28, 32)]
+    assert dias_da_mascara(mascara_regra(periodo, 2027), 2027) == [date(2027, 1, 1), date(2027, 1, 2)]
+    assert mascara_regra(periodo, 2028) == 0
+
+    segundas = dias_da_mascara(mascara_regra({'tipo': 'semanal', 'dia_semana': 0}, 2026), 2026)
+    assert len(segundas) == 52 and all(d.weekday() == 0 for d in segundas)
+
+    ultimas_sextas = dias_da_mascara(mascara_regra({'tipo': 'mensal', 'dia_semana': 4, 'ordem': -1}, 2026), 2026)
+    assert ultimas_sextas[:3] == [date(2026, 1, 30), date(2026, 2, 27), date(2026, 3, 27)]
+    quintas_segundas = dias_da_mascara(mascara_regra({'tipo': 'mensal', 'dia_semana': 0, 'ordem': 5}, 2026), 2026)
+    assert quintas_segundas == [date(2026, 3, 30), date(2026, 6, 29), date(2026, 8, 31), date(2026, 11, 30)]
+
+    natal = {'tipo': 'feriado', 'mes': 12, 'dia': 25, 'anos': [2027]}
+    assert mascara_regra(natal, 2026) == 0 and mascara_regra(natal, 2027) != 0
+
+    with pytest.raises(ValueError):
+        mascara_regra({'tipo': 'quinzenal'}, 2026)
+
+
+def test_cache_e_invalidado_por_ano():
+    calendario = CalendarioProducao()
+    calendario.compilar_horizonte(2026, 3)
+    assert calendario.dia_util(date(2026, 12, 25))
+
+    # Data avulsa: só o ano dela é recompilado
+    anos_2027 = calendario._cache[2027]
+    calendario.bloquear_data(date(2026, 12, 24))
+    assert 2026 not in calendario._cache and calendario._cache[2027] is anos_2027
+    assert not calendario.dia_util(date(2026, 12, 24))
+
+    calendario.definir_datas_bloqueadas([date(2027, 3, 1)])
+    assert calendario.dia_util(date(2026, 12, 24))
+    assert not calendario.dia_util(date(2027, 3, 1))
+
+    # Regras e região invalidam todos os anos
+    calendario.compilar_horizonte(2026, 3)
+    calendario.adicionar_regra({'tipo': 'feriado', 'nome': 'Natal', 'mes': 12, 'dia': 25})
+    assert calendario._cache == {}
+    assert not calendario.dia_util(date(2026, 12, 25)) and not calendario.dia_util(date(2028, 12, 25))
+    calendario.remover_regra(0)
+    assert calendario.dia_util(date(2026, 12, 25))
+
+    calendario.adicionar_regra({'tipo': 'data', 'nome': 'Aniversário', 'data': '2026-01-25', 'regiao': 'SP'})
+    assert calendario.dia_util(date(2026, 1, 26))
+    calendario.adicionar_regra({'tipo': 'data', 'nome': 'Aniversário', 'data': '2026-01-26', 'regiao': 'SP'})
+    assert calendario.dia_util(date(2026, 1, 26))
+    calendario.definir_regiao('SP')
+    assert not calendario.dia_util(date(2026, 1, 26))
+    calendario.definir_regiao('')
+    assert calendario.dia_util(date(2026, 1, 26))
+
+
+def test_periodo_invertido_e_rejeitado():
+    calendario = CalendarioProducao()
+    with pytest.raises(ValueError):
+        calendario.adicionar_regra({'tipo': 'periodo', 'nome': 'Férias', 'inicio': '2026-12-31', 'fim': '2026-12-20'})
+    assert calendario.regras == []
+    # Um período de um único dia é válido
+    calendario.adicionar_regra({'tipo': 'periodo', 'nome': 'Parada', 'inicio': '2026-12-21', 'fim': '2026-12-21'})
+    assert len(calendario.regras) == 1
+    assert not calendario.dia_util(date(2026, 12, 21)) and calendario.dia_util(date(2026, 12, 22))
+
+
+def test_avancar_dias_uteis_igual_ao_passo_a_passo():
+    aleatorio = random.Random(27)
+    calendario = CalendarioProducao(
+        FERIADOS_NACIONAIS + [
+            {'tipo': 'periodo', 'nome': 'Férias', 'inicio': '2026-12-21', 'fim': '2027-01-08'},
+            {'tipo': 'mensal', 'nome': 'Inventário', 'dia_semana': 4, 'ordem': -1},
+        ],
+        [date(2026, 10, 20)]
+    )
+    for _ in range(300):
+        inicio = date(2026, 1, 1) + timedelta(days=aleatorio.randrange(900))
+        quantidade = aleatorio.choice([0, 1, 2, 5, 30, 250, 600])
+        assert calendario.avancar_dias_uteis(inicio, quantidade) == avancar_dia_a_dia(calendario, inicio, quantidade)
+
+    # Datetime mantém o tipo e o horário
+    assert calendario.avancar_dias_uteis(datetime(2026, 10, 19, 8), 1) == datetime(2026, 10, 21, 8)
+    assert calendario.proximo_dia_util(datetime(2026, 10, 20, 8)) == datetime(2026, 10, 21, 8)
+    assert calendario.proximo_dia_util(date(2026, 10, 19)) == date(2026, 10, 19)
+
+
+def test_sem_dias_uteis_no_horizonte():
+    calendario = CalendarioProducao([{'tipo': 'periodo', 'nome': 'Parada', 'inicio': '2026-01-01', 'fim': '2045-12-31'}])
+    with pytest.raises(ValueError):
+        calendario.proximo_dia_util(date(2026, 1, 1))
+
+
+def test_regras_de_datas():
+    assert regras_de_datas(['2026-07-09', date(2026, 9, 7)]) == [
+        {'tipo': 'data', 'nome': 'Dia bloqueado', 'data': '2026-07-09'},
+        {'tipo': 'data', 'nome': 'Dia bloqueado', 'data': '2026-09-07'},
+    ]
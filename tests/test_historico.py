@@ -0,0 +1,170 @@
+import random
+from datetime import date, datetime
+
+from historico import (ConjuntoPersistente, HistoricoEdicoes, VetorPersistente, dias_alterados,
+                       posicao_a_recalcular, primeira_diferenca)
+
+
+def verificar_avl(no):
+    # Retorna (altura, tamanho) e confere balanceamento e campos guardados
+    if no is None:
+        return 0, 0
+    _, esq, dir, altura, tamanho = no
+    altura_esq, tamanho_esq = verificar_avl(esq)
+    altura_dir, tamanho_dir = verificar_avl(dir)
+    assert abs(altura_esq - altura_dir) <= 1
+    assert altura == max(altura_esq, altura_dir) + 1
+    assert tamanho == tamanho_esq + tamanho_dir + 1
+    return altura, tamanho
+
+
+def pedido(n):
+    return {'id': n, 'name': f'P{n}', 'items': [{'part_name': 'x', 'total_time': 60}], 'total_minutes': 60 * n,
+            'start_date': datetime(2026, 1, 5), 'end_date': datetime(2026, 1, 5), 'days_needed': 1}
+
+
+def test_vetor_acompanha_uma_lista():
+    aleatorio = random.Random(26)
+    vetor, lista = VetorPersistente(), []
+    versoes = []
+    for passo in range(3000):
+        operacao = aleatorio.random()
+        if operacao < 0.35 or not lista:
+            idx = aleatorio.randint(0, len(lista))
+            vetor = vetor.inserir(idx, passo)
+            lista.insert(idx, passo)
+        elif operacao < 0.45:
+            vetor = vetor.anexar(passo)
+            lista.append(passo)
+        elif operacao < 0.7:
+            idx = aleatorio.randrange(len(lista))
+            vetor = vetor.remover(idx)
+            lista.pop(idx)
+        elif operacao < 0.85 and len(lista) > 1:
+            i, j = aleatorio.sample(range(len(lista)), 2)
+            vetor = vetor.trocar(i, j)
+            lista[i], lista[j] = lista[j], lista[i]
+        else:
+            idx = aleatorio.randrange(len(lista))
+            vetor = vetor.substituir(idx, -passo)
+            lista[idx] = -passo
+        versoes.append((vetor, list(lista)))
+
+        assert len(vetor) == len(lista)
+        if lista:
+            idx = aleatorio.randrange(len(lista))
+            assert vetor[idx] == lista[idx]
+        if passo % 100 == 0:
+            assert list(vetor) == lista
+            verificar_avl(vetor._raiz)
+
+    # As versões antigas continuam intactas
+    for antigo, esperado in versoes[::250]:
+        assert list(antigo) == esperado
+        verificar_avl(antigo._raiz)
+
+
+def test_vetor_construido_de_uma_vez_e_balanceado():
+    vetor = VetorPersistente(range(1000))
+    assert verificar_avl(vetor._raiz) == (10, 1000)
+    assert list(vetor) == list(range(1000))
+    assert vetor[-1] == 999
+
+
+def test_conjunto_acompanha_um_set():
+    aleatorio = random.Random(27)
+    conjunto, esperado = ConjuntoPersistente(), set()
+    for passo in range(2000):
+        valor = aleatorio.randrange(300)
+        if aleatorio.random() < 0.6:
+            conjunto = conjunto.adicionar(valor)
+            esperado.add(valor)
+        else:
+            conjunto = conjunto.descartar(valor)
+            esperado.discard(valor)
+        assert len(conjunto) == len(esperado)
+        assert (valor in conjunto) == (valor in esperado)
+        if passo % 100 == 0:
+            assert list(conjunto) == sorted(esperado)
+            verificar_avl(conjunto._raiz)
+
+
+def test_desfazer_e_refazer_depois_do_descarte():
+    historico = HistoricoEdicoes(limite=3)
+    for n in range(1, 6):
+        historico.adicionar_pedido(pedido(n))
+    assert [p['id'] for p in historico.atual.pedidos] == [1, 2, 3, 4, 5]
+
+    # Só os 3 estados mais recentes podem ser desfeitos
+    desfeitos = []
+    while historico.pode_desfazer:
+        desfeitos.append([p['id'] for p in historico.desfazer().pedidos])
+    assert desfeitos == [[1, 2, 3, 4], [1, 2, 3], [1, 2]]
+    assert historico.desfazer() is None
+
+    assert [p['id'] for p in historico.refazer().pedidos] == [1, 2, 3]
+    assert [p['id'] for p in historico.refazer().pedidos] == [1, 2, 3, 4]
+
+    # Uma edição nova descarta os estados que podiam ser refeitos
+    historico.trocar_pedidos(0, 3)
+    assert not historico.pode_refazer
+    assert historico.refazer() is None
+    assert [p['id'] for p in historico.atual.pedidos] == [4, 2, 3, 1]
+    assert [p['id'] for p in historico.desfazer().pedidos] == [1, 2, 3, 4]
+
+
+def test_registros_do_historico_nao_acompanham_o_pedido_vivo():
+    order = pedido(1)
+    historico = HistoricoEdicoes([order])
+    order['items'][0]['total_time'] = 0
+    order['name'] = 'Alterado'
+    base = historico.atual.pedidos[0]
+    assert base['name'] == 'P1' and base['items'][0]['total_time'] == 60
+
+
+def test_primeira_diferenca():
+    historico = HistoricoEdicoes([pedido(n) for n in range(1, 6)])
+    inicial = historico.atual
+    assert primeira_diferenca(inicial, inicial) == 5
+
+    trocado = historico.trocar_pedidos(2, 3)
+    assert primeira_diferenca(inicial, trocado) == 2
+    removido = historico.remover_pedido(4)
+    assert primeira_diferenca(trocado, removido) == 4
+    adicionado = historico.adicionar_pedido(pedido(6))
+    assert primeira_diferenca(removido, adicionado) == 4
+    assert primeira_diferenca(adicionado, removido) == 4
+
+    # Dias bloqueados não mudam a fila
+    bloqueado = historico.bloquear_dia(date(2026, 1, 7))
+    assert primeira_diferenca(adicionado, bloqueado) == 5
+    assert dias_alterados(adicionado, bloqueado) == {date(2026, 1, 7)}
+    assert dias_alterados(bloqueado, adicionado) == {date(2026, 1, 7)}
+    assert dias_alterados(inicial, adicionado) == set()
+
+
+def test_posicao_a_recalcular():
+    orders = [pedido(n) for n in range(1, 5)]
+    for idx, order in enumerate(orders):
+        order['start_date'] = datetime(2026, 1, 5 + 2 * idx)
+        order['end_date'] = datetime(2026, 1, 6 + 2 * idx)
+    historico = HistoricoEdicoes(orders)
+    inicial = historico.atual
+
+    # Bloquear o dia 9 afeta o pedido que termina no dia 10 (posição 2)
+    bloqueado = historico.bloquear_dia(date(2026, 1, 9))
+    assert posicao_a_recalcular(inicial, bloqueado, orders) == 2
+    assert posicao_a_recalcular(bloqueado, inicial, orders) == 2
+    # Um dia depois do último pedido não muda nada na fila
+    depois = historico.bloquear_dia(date(2026, 2, 1))
+    assert posicao_a_recalcular(bloqueado, depois, orders) == 4
+
+    # Troca na posição 1 junto com um dia bloqueado mais adiante: vale a troca
+    historico = HistoricoEdicoes(orders)
+    inicial = historico.atual
+    historico.trocar_pedidos(1, 2)
+    ambos = historico.bloquear_dia(date(2026, 1, 11))
+    assert posicao_a_recalcular(ambos, inicial, orders) == 1
+    # Um dia bloqueado antes da troca antecipa o recálculo
+    historico.bloquear_dia(date(2026, 1, 5))
+    assert posicao_a_recalcular(historico.atual, inicial, orders) == 0
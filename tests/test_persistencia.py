@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+import persistencia
+from historico import HistoricoEdicoes, VetorPersistente
+from persistencia import GravadorAssincrono, datas_para_json, instantaneo_para_json, plano_para_json
+
+
+@pytest.fixture
+def gravador():
+    g = GravadorAssincrono(atraso=0.2)
+    yield g
+    g.encerrar(timeout=2)
+
+
+def test_debounce_agrupa_marcacoes(gravador, tmp_path, monkeypatch):
+    gravacoes = []
+    gravar_original = persistencia.gravar_json
+
+    def contar(caminho, dados):
+        gravacoes.append(dados)
+        gravar_original(caminho, dados)
+
+    monkeypatch.setattr(persistencia, 'gravar_json', contar)
+    caminho = str(tmp_path / 'pedidos.json')
+    for i in range(20):
+        gravador.marcar(caminho, list(range(i + 1)))
+
+    assert not os.path.exists(caminho)
+    time.sleep(0.6)
+    assert gravacoes == [list(range(20))]
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == list(range(20))
+
+
+def test_descarregar_grava_sem_esperar_debounce(tmp_path):
+    gravador = GravadorAssincrono(atraso=60)
+    try:
+        a = str(tmp_path / 'a.json')
+        b = str(tmp_path / 'b.json')
+        g1 = gravador.marcar(a, {'v': 1})
+        g2 = gravador.marcar(b, {'v': 2})
+        assert not gravador.gravado(g1)
+
+        assert gravador.descarregar(timeout=2)
+        assert gravador.gravado(g1) and gravador.gravado(g2)
+        assert gravador.pendentes == []
+        with open(b, encoding='utf-8') as f:
+            assert json.load(f) == {'v': 2}
+    finally:
+        gravador.encerrar(timeout=2)
+
+
+def test_dados_ficam_fixos_no_momento_da_marcacao(gravador, tmp_path):
+    caminho = str(tmp_path / 'bloqueados.json')
+    dias = ['2026-01-01']
+    gravador.marcar(caminho, list(dias))
+    dias.append('2026-12-25')
+
+    assert gravador.descarregar(timeout=2)
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == ['2026-01-01']
+
+
+def test_falha_nao_conta_como_gravado(gravador, tmp_path):
+    pasta = tmp_path / 'planta'
+    caminho = str(pasta / 'historico.json')
+    outro = str(tmp_path / 'outro.json')
+    g1 = gravador.marcar(caminho, {'v': 1})
+    g2 = gravador.marcar(outro, {'v': 2})
+
+    assert not gravador.descarregar(timeout=2)
+    assert not gravador.gravado(g1)
+    assert not gravador.gravado(g2)
+    assert caminho in gravador.erros
+    assert caminho in gravador.pendentes
+
+    # Quando a pasta passa a existir a gravação pendente é refeita
+    pasta.mkdir()
+    assert gravador.descarregar(timeout=2)
+    assert gravador.gravado(g2)
+    assert gravador.erros == {}
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == {'v': 1}
+
+
+def test_marcar_desde_nao_sobrescreve_marcacao_mais_nova(tmp_path):
+    gravador = GravadorAssincrono(atraso=60)
+    try:
+        caminho = str(tmp_path / 'historico.json')
+        gravador.marcar(caminho, {'v': 1})
+        assert gravador.descarregar(timeout=2)
+        descarregado = gravador.geracao
+
+        # Sem marcação nova desde a descarga, a gravação vale
+        assert gravador.marcar(caminho, {'v': 2}, desde=descarregado) is not None
+        # Uma marcação posterior (outra sessão) não é sobrescrita
+        gravador.marcar(caminho, {'v': 3})
+        assert gravador.marcar(caminho, {'v': 4}, desde=descarregado) is None
+        assert gravador.descarregar(timeout=2)
+        with open(caminho, encoding='utf-8') as f:
+            assert json.load(f) == {'v': 3}
+    finally:
+        gravador.encerrar(timeout=2)
+
+
+def test_serializar_roda_na_thread_de_gravacao(gravador, tmp_path):
+    threads = []
+
+    def serializar(dados):
+        threads.append(threading.current_thread().name)
+        return list(dados)
+
+    caminho = str(tmp_path / 'bloqueados.json')
+    gravador.marcar(caminho, ('2026-01-01', '2026-12-25'), serializar=serializar)
+    assert threads == []
+
+    assert gravador.descarregar(timeout=2)
+    assert threads == ['gravador-assincrono']
+    with open(caminho, encoding='utf-8') as f:
+        assert json.load(f) == ['2026-01-01', '2026-12-25']
+
+
+def test_instantaneo_gera_o_mesmo_json_que_o_plano():
+    config = {'workers': 2, 'minutes_per_day': 480, 'efficiency': 100, 'config_saved': True}
+    orders = [
+        {'id': 1, 'name': 'A', 'items': [{'part_name': 'x', 'total_time': 600}], 'total_minutes': 600,
+         'start_date': datetime(2026, 1, 5), 'end_date': datetime(2026, 1, 6), 'days_needed': 1},
+        {'id': 2, 'name': 'B', 'items': [], 'total_minutes': 100,
+         'start_date': datetime(2026, 1, 7), 'end_date': datetime(2026, 1, 7), 'days_needed': 1},
+    ]
+    historico = HistoricoEdicoes(orders)
+    # Os registros do histórico guardam as datas do cadastro; valem as do vetor
+    datas = VetorPersistente([
+        (datetime(2026, 1, 5), datetime(2026, 1, 7), 2),
+        (datetime(2026, 1, 8), datetime(2026, 1, 8), 1),
+    ])
+    orders[0].update(end_date=datetime(2026, 1, 7), days_needed=2)
+    orders[1].update(start_date=datetime(2026, 1, 8), end_date=datetime(2026, 1, 8))
+
+    assert instantaneo_para_json((config, historico.atual.pedidos, datas)) == plano_para_json(config, orders)
+    assert datas_para_json(historico.atual.bloqueados) == []
@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+
+from persistencia import carregar_json, gravar_json
+from plantas import (PLANTA_PADRAO, caminhos_da_planta, consolidar, criar_planta, reagendar_plantas,
+                     resumir_plano, revisao_do_plano)
+
+CONFIG = {'workers': 1, 'minutes_per_day': 480, 'efficiency': 100, 'config_saved': True}
+
+
+def pedido(minutos, inicio, fim):
+    return {'total_minutes': minutos, 'start_date': inicio, 'end_date': fim, 'items': []}
+
+
+@pytest.fixture
+def pasta(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+
+def test_resumir_plano():
+    orders = [
+        pedido(600, datetime(2026, 1, 30), datetime(2026, 2, 2)),
+        pedido(300, datetime(2026, 2, 3), datetime(2026, 2, 3)),
+        pedido(100, datetime(2026, 1, 5), datetime(2026, 1, 5)),
+    ]
+    resumo = resumir_plano('Sul', CONFIG, orders)
+    assert resumo['plantas'] == ['Sul']
+    assert resumo['pedidos'] == 3
+    assert resumo['minutos'] == 1000
+    assert resumo['capacidade_diaria'] == 480
+    assert resumo['inicio'] == datetime(2026, 1, 5)
+    assert resumo['fim'] == datetime(2026, 2, 3)
+    assert resumo['por_mes'] == {'2026-01': (100, 1), '2026-02': (900, 2)}
+
+    # Sem configuração salva a capacidade não entra na soma
+    assert resumir_plano('Norte', {}, [])['capacidade_diaria'] == 0
+
+
+def test_consolidar_soma_as_plantas():
+    sul = resumir_plano('Sul', CONFIG, [pedido(600, datetime(2026, 3, 2), datetime(2026, 3, 3))])
+    norte = resumir_plano('Norte', dict(CONFIG, workers=2), [
+        pedido(200, datetime(2026, 2, 2), datetime(2026, 2, 2)),
+        pedido(400, datetime(2026, 3, 9), datetime(2026, 4, 1)),
+    ])
+    vazia = resumir_plano('Leste', {}, [])
+
+    total = consolidar([sul, norte, vazia])
+    assert total['plantas'] == ['Sul', 'Norte', 'Leste']
+    assert total['pedidos'] == 3
+    assert total['minutos'] == 1200
+    assert total['capacidade_diaria'] == 480 * 3
+    assert total['inicio'] == datetime(2026, 2, 2)
+    assert total['fim'] == datetime(2026, 4, 1)
+    assert total['por_mes'] == {'2026-02': (200, 1), '2026-03': (600, 1), '2026-04': (400, 1)}
+    assert list(total['por_mes']) == sorted(total['por_mes'])
+
+
+def test_reagendar_plantas_isola_a_planta_com_falha(pasta):
+    criar_planta('Sul')
+    criar_planta('Quebrada')
+    orders = [
+        {'total_minutes': 600, 'start_date': '2026-10-19', 'end_date': '2026-10-19', 'items': []},
+        {'total_minutes': 480, 'start_date': '2026-10-19', 'end_date': '2026-10-19', 'items': []},
+    ]
+    gravar_json(caminhos_da_planta(PLANTA_PADRAO)['historico'], {'config': CONFIG, 'orders': orders})
+    gravar_json(caminhos_da_planta('Sul')['historico'], {'config': CONFIG, 'orders': orders[:1]})
+    gravar_json(caminhos_da_planta('Sul')['regras'], [{'tipo': 'data', 'nome': 'Parada', 'data': '2026-10-20'}])
+    # Pedido sem total_minutes: o reagendamento dessa planta falha
+    gravar_json(caminhos_da_planta('Quebrada')['historico'], {'config': CONFIG, 'orders': [
+        {'start_date': '2026-10-19', 'end_date': '2026-10-19', 'items': []}
+    ]})
+
+    gravados = {}
+    revisoes = {planta: revisao_do_plano(planta) for planta in (PLANTA_PADRAO, 'Sul', 'Quebrada')}
+    resumos, total = reagendar_plantas(gravar=lambda caminho, dados: gravados.update({caminho: dados}), processos=False)
+
+    por_planta = {resumo['plantas'][0]: resumo for resumo in resumos}
+    assert [resumo['plantas'][0] for resumo in resumos] == [PLANTA_PADRAO, 'Quebrada', 'Sul']
+    assert por_planta['Quebrada']['erro'] and por_planta['Quebrada']['pedidos'] == 0
+    assert por_planta[PLANTA_PADRAO]['erro'] is None and por_planta['Sul']['erro'] is None
+    assert por_planta['Sul']['fim'] == datetime(2026, 10, 22)
+    assert total['pedidos'] == 3 and total['plantas'] == [PLANTA_PADRAO, 'Quebrada', 'Sul']
+
+    # Os planos voltam por `gravar`; os arquivos não são tocados pelos workers
+    assert set(gravados) == {caminhos_da_planta(PLANTA_PADRAO)['historico'], caminhos_da_planta('Sul')['historico']}
+    assert gravados[caminhos_da_planta('Sul')['historico']]['orders'][0]['end_date'] == '2026-10-22'
+    assert carregar_json(caminhos_da_planta('Sul')['historico'])['orders'][0]['end_date'] == '2026-10-19'
+
+    assert revisao_do_plano(PLANTA_PADRAO) == revisoes[PLANTA_PADRAO] + 1
+    assert revisao_do_plano('Sul') == revisoes['Sul'] + 1
+    assert revisao_do_plano('Quebrada') == revisoes['Quebrada']
+
+
+def test_falha_ao_gravar_vira_erro_da_planta(pasta):
+    criar_planta('Sul')
+    gravar_json(caminhos_da_planta('Sul')['historico'], {'config': CONFIG, 'orders': [
+        {'total_minutes': 600, 'start_date': '2026-10-19', 'end_date': '2026-10-19', 'items': []}
+    ]})
+
+    def recusar(caminho, dados):
+        raise ValueError("Plano alterado durante o reagendamento")
+
+    revisao = revisao_do_plano('Sul')
+    resumos, _ = reagendar_plantas(['Sul'], gravar=recusar, processos=False)
+    assert resumos[0]['erro'] == "Plano alterado durante o reagendamento"
+    assert revisao_do_plano('Sul') == revisao
@@ -0,0 +1,92 @@
+import random
+from datetime import datetime
+
+import pytest
+
+from agendador import reagendar, reagendar_com_roteiro
+from calendario import CalendarioProducao
+from roteiro import CENTRO_PADRAO, capacidades_dos_centros, parse_routing, simular
+
+
+def item(minutos, roteiro=None, quantidade=1):
+    item = {'quantity': quantidade, 'total_time': minutos}
+    if roteiro:
+        item['routing'] = [
+            {'operation': centro, 'work_center': centro, 'time_minutes': tempo} for centro, tempo in roteiro
+        ]
+    return item
+
+
+def pedido(*items):
+    return {'total_minutes': sum(i['total_time'] for i in items), 'items': list(items)}
+
+
+def test_parse_routing_rejeita_centro_padrao():
+    assert parse_routing("Corte; Corte; 2\n\nCostura; Costura; 1,5") == [
+        {'operation': 'Corte', 'work_center': 'Corte', 'time_minutes': 2.0},
+        {'operation': 'Costura', 'work_center': 'Costura', 'time_minutes': 1.5},
+    ]
+    with pytest.raises(ValueError):
+        parse_routing(f"Montagem; {CENTRO_PADRAO}; 3")
+
+
+def test_centros_dividem_os_trabalhadores():
+    roteado = pedido(item(600, [('Corte', 3), ('Costura', 3)], 100))
+    misto = pedido(item(600, [('Corte', 3), ('Costura', 3)], 100), item(300))
+
+    assert capacidades_dos_centros([pedido(item(300))], 4, {}, 100) == {CENTRO_PADRAO: 400}
+    assert capacidades_dos_centros([roteado], 4, {}, 100) == {'Corte': 200, 'Costura': 200}
+    assert capacidades_dos_centros([misto], 4, {'Corte': 2}, 100) == {'Corte': 200, 'Costura': 100, CENTRO_PADRAO: 100}
+    assert capacidades_dos_centros([misto], 3, {'Corte': 2, 'Costura': 1}, 100) == {'Corte': 200, 'Costura': 100, CENTRO_PADRAO: 0}
+    with pytest.raises(ValueError):
+        capacidades_dos_centros([roteado], 2, {'Corte': 2, 'Costura': 1}, 100)
+    with pytest.raises(ValueError):
+        simular([misto], capacidades_dos_centros([misto], 3, {'Corte': 2, 'Costura': 1}, 100))
+
+
+def test_capacidade_por_centro():
+    pedidos = [pedido(item(0, [('Corte', 1), ('Costura', 1)], 100))]
+    assert simular(pedidos, {'Corte': 100, 'Costura': 50}) == [(0.0, 3.0)]
+    assert simular(pedidos, {'Corte': 50, 'Costura': 100}) == [(0.0, 3.0)]
+    assert simular(pedidos, {'Corte': 200, 'Costura': 200}) == [(0.0, 1.0)]
+
+
+def test_pipeline_entre_centros():
+    # O segundo pedido corta enquanto o primeiro costura
+    pedidos = [pedido(item(0, [('Corte', 1), ('Costura', 1)], 100)) for _ in range(3)]
+    assert simular(pedidos, {'Corte': 100, 'Costura': 100}) == [(0.0, 2.0), (1.0, 3.0), (2.0, 4.0)]
+
+
+def test_mesmo_trabalho_nao_fica_mais_rapido_com_roteiro():
+    config = {'workers': 1, 'minutes_per_day': 480, 'efficiency': 100, 'work_centers': {}}
+    sem_roteiro = [pedido(item(600, quantidade=100)) for _ in range(2)]
+    com_roteiro = [pedido(item(600, [('Corte', 3), ('Costura', 3)], 100)) for _ in range(2)]
+    reagendar(sem_roteiro, config, CalendarioProducao([], []), 0, datetime(2026, 10, 19))
+    reagendar(com_roteiro, config, CalendarioProducao([], []), 0, datetime(2026, 10, 19))
+
+    # Cada centro fica com meio trabalhador: o último pedido termina no
+    # 4º dia útil (3,75 dias), e não em menos de 2,5 dias de trabalho total
+    assert com_roteiro[-1]['end_date'] == datetime(2026, 10, 23)
+    assert sem_roteiro[-1]['end_date'] == datetime(2026, 10, 26)
+
+
+def test_plano_sem_roteiro_tem_as_datas_do_agendamento_sequencial():
+    aleatorio = random.Random(29)
+    calendario = CalendarioProducao([{'tipo': 'semanal', 'nome': 'Quarta', 'dia_semana': 2}], [])
+    for _ in range(100):
+        config = {
+            'workers': aleatorio.randint(1, 5),
+            'minutes_per_day': aleatorio.choice([240, 480, 528]),
+            'efficiency': aleatorio.choice([70, 85, 100]),
+            'work_centers': {},
+        }
+        pedidos = [pedido(item(aleatorio.randint(1, 5000))) for _ in range(aleatorio.randint(1, 15))]
+        inicio = datetime(2026, 1, aleatorio.randint(1, 31))
+        sequencial = [dict(p) for p in pedidos]
+        simulado = [dict(p) for p in pedidos]
+
+        reagendar(sequencial, config, calendario, 0, inicio)
+        reagendar_com_roteiro(simulado, config, calendario, inicio)
+
+        campos = ('start_date', 'end_date', 'days_needed')
+        assert [[p[c] for c in campos] for p in simulado] == [[p[c] for c in campos] for p in sequencial]